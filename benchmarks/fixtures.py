@@ -0,0 +1,243 @@
+import sys
+import json
+import time
+import types
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+from stockdoc.metrics import FLOWS, BALANCES
+
+# Local stand-ins for the two upstreams: FakeDatabase answers the pyrebase
+# calls the app makes against a dict shaped like the Firebase export (year,
+# quarter, dividends, allnames), and FakeYahoo answers the yahoo_fin calls from
+# generated daily bars. Fixtures are synthetic by default; a real Firebase
+# export can be loaded with load_root() instead.
+
+FIELDS = [*FLOWS.values(), *BALANCES.values(), 'longTermDebt', 'longTermDebtNoncurrent']
+START = pd.Timestamp('2005-03-31')
+
+
+def ticker_names(n):
+    return [f'T{i:03d}' for i in range(n)]
+
+
+def period_records(rng, dates, shares, scale):
+    # Values are strings with the odd 'None', as the ingest job writes them
+    records = []
+    for date, count in zip(dates, shares):
+        record = {'endDate': date.strftime('%Y-%m-%d'), 'reportedCurrency': 'USD',
+                  'fiscalDateEnding': date.strftime('%Y-%m-%d')}
+        for field in FIELDS:
+            record[field] = 'None' if rng.random() < 0.05 else str(int(rng.uniform(0.2, 1.0) * scale))
+        record['commonStockSharesOutstanding'] = str(int(count))
+        records.append(record)
+
+    return records
+
+
+def company(rng, ticker, quarters):
+    dates = pd.date_range(START, periods=quarters, freq='Q')
+    shares = 1e9 * np.cumprod(rng.uniform(0.99, 1.01, quarters))
+    # roughly one in three companies has a split somewhere in its history
+    if rng.random() < 0.35:
+        split = int(rng.integers(4, quarters - 4))
+        shares[split:] *= int(rng.choice([2, 3, 4, 10]))
+    scale = rng.uniform(1e8, 5e10)
+
+    annual_rows = list(range(3, quarters, 4))
+    year = period_records(rng, dates[annual_rows], shares[annual_rows], scale * 4)
+    quarter = period_records(rng, dates, shares, scale)
+
+    if rng.random() < 0.4:
+        dividends = [{'index': 'empty'}]
+    else:
+        paid = pd.date_range(START + pd.Timedelta(days=45), periods=quarters, freq='Q')
+        amount = rng.uniform(0.1, 1.5)
+        dividends = [{'index': date.strftime('%Y-%m-%d'), 'dividend': str(round(amount * 1.01 ** i, 4)),
+                      'ticker': ticker} for i, date in enumerate(paid)]
+
+    return year, quarter, dividends
+
+
+def synthetic_root(tickers, quarters=72, seed=0):
+    rng = np.random.default_rng(seed)
+    root = {'year': {}, 'quarter': {}, 'dividends': {}, 'allnames': {'list': {'names': list(tickers)}}}
+    for ticker in tickers:
+        year, quarter, dividends = company(rng, ticker, quarters)
+        root['year'][ticker] = year
+        root['quarter'][ticker] = quarter
+        root['dividends'][ticker] = dividends
+
+    return root
+
+
+def load_root(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def price_history(ticker, end=None, days=None, seed=0):
+    # Shaped like si.get_data: OHLC, adjclose, volume and ticker on a date index
+    end = pd.Timestamp(end or pd.Timestamp.today().normalize())
+    dates = pd.bdate_range(START, end) if days is None else pd.bdate_range(end=end, periods=days)
+    rng = np.random.default_rng([seed, sum(map(ord, ticker))])
+    close = 20 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, len(dates))))
+
+    return pd.DataFrame({'open': close, 'high': close * 1.01, 'low': close * 0.99, 'close': close,
+                         'adjclose': close, 'volume': rng.integers(1e5, 1e7, len(dates)),
+                         'ticker': ticker.upper()}, index=dates)
+
+
+class FakeResponse:
+    def __init__(self, value):
+        self.value = value
+
+    def val(self):
+        return self.value
+
+
+class FakeStream:
+    def __init__(self, streams, path, handler):
+        self.streams = streams
+        self.path = path
+        self.handler = handler
+
+    def close(self):
+        if self in self.streams:
+            self.streams.remove(self)
+
+
+class FakeDatabase:
+    # Keeps its query on the object the way pyrebase's Database does: child()
+    # appends to the path, shallow/order_by_key/start_at add to the query, and
+    # get/stream/set use them and reset both. Like the real thing, one object
+    # is not safe to share between threads; connect() opens another connection
+    # to the same data (streams see writes made through any of them).
+    def __init__(self, root, latency=0.0, streams=None):
+        self.root = root
+        self.latency = latency
+        self.streams = [] if streams is None else streams
+        self.path = ()
+        self.query = {}
+
+    def connect(self):
+        return FakeDatabase(self.root, self.latency, self.streams)
+
+    def child(self, *keys):
+        self.path = (*self.path, *(str(key) for key in keys))
+        return self
+
+    def shallow(self):
+        self.query['shallow'] = True
+        return self
+
+    def order_by_key(self):
+        self.query['orderBy'] = '$key'
+        return self
+
+    def start_at(self, key):
+        self.query['startAt'] = int(key)
+        return self
+
+    def _take(self):
+        path, query = self.path, self.query
+        self.path, self.query = (), {}
+        return path, query
+
+    def _read(self, path, query):
+        node = self.root
+        for key in path:
+            if isinstance(node, list):
+                node = node[int(key)] if int(key) < len(node) else None
+            elif isinstance(node, dict):
+                node = node.get(key)
+            if node is None:
+                return None
+
+        if query.get('shallow'):
+            keys = range(len(node)) if isinstance(node, list) else node
+            return [str(key) for key in keys]
+        if 'startAt' in query:
+            items = enumerate(node) if isinstance(node, list) else ((int(k), v) for k, v in node.items())
+            return OrderedDict((str(i), v) for i, v in items if i >= query['startAt']) or None
+
+        return json.loads(json.dumps(node))
+
+    def get(self):
+        path, query = self._take()
+        if self.latency:
+            time.sleep(self.latency)
+
+        return FakeResponse(self._read(path, query))
+
+    def stream(self, handler):
+        # Like pyrebase: a 'put' of the whole node first, then one message per
+        # write below it, delivered synchronously here
+        path, query = self._take()
+        stream = FakeStream(self.streams, path, handler)
+        self.streams.append(stream)
+        handler({'event': 'put', 'path': '/', 'data': self._read(path, query)})
+        return stream
+
+    def set(self, value):
+        # Writes value at the path, as the ingest job does, and notifies streams
+        path, _ = self._take()
+        node = self.root
+        for key in path[:-1]:
+            node = node[int(key)] if isinstance(node, list) else node.setdefault(key, {})
+        key = path[-1]
+        if isinstance(node, list):
+            node.extend([None] * (int(key) + 1 - len(node)))
+            node[int(key)] = value
+        else:
+            node[key] = value
+
+        for stream in list(self.streams):
+            if path[:len(stream.path)] == stream.path:
+                below = path[len(stream.path):]
+                stream.handler({'event': 'put', 'path': '/' + '/'.join(below), 'data': value})
+
+
+class FakeYahoo(types.ModuleType):
+    def __init__(self, latency=0.0, seed=0):
+        super().__init__('yahoo_fin.stock_info')
+        self.latency = latency
+        self.seed = seed
+        self.histories = {}
+
+    def _history(self, ticker):
+        if ticker not in self.histories:
+            self.histories[ticker] = price_history(ticker, seed=self.seed)
+        return self.histories[ticker]
+
+    def get_data(self, ticker, start_date=None, end_date=None, index_as_date=True, interval='1d'):
+        if self.latency:
+            time.sleep(self.latency)
+        history = self._history(ticker)
+        if start_date is not None:
+            history = history[history.index >= pd.Timestamp(start_date)]
+        return history.copy()
+
+    def get_stats_valuation(self, ticker):
+        if self.latency:
+            time.sleep(self.latency)
+        labels = ['Market Cap (intraday)', 'Enterprise Value', 'Trailing P/E', 'Forward P/E',
+                  'PEG Ratio (5 yr expected)', 'Price/Sales (ttm)', 'Price/Book (mrq)',
+                  'Enterprise Value/Revenue', 'Enterprise Value/EBITDA']
+        return pd.DataFrame({0: labels, 1: ['1.5T', '1.6T', '25.1', '22.3', '1.8', '6.2', '30.4', '6.5', '19.2']})
+
+    def get_live_price(self, ticker):
+        return float(self._history(ticker)['close'].iloc[-1])
+
+
+def install_yahoo(latency=0.0, seed=0):
+    # snapshots and the app import yahoo_fin.stock_info lazily, so registering
+    # the stand-in here is enough to route them to it
+    stock_info = FakeYahoo(latency, seed)
+    package = types.ModuleType('yahoo_fin')
+    package.stock_info = stock_info
+    sys.modules['yahoo_fin'] = package
+    sys.modules['yahoo_fin.stock_info'] = stock_info
+
+    return stock_info
@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from stockdoc import snapshots
+from stockdoc.cache import SharedCache, SQLiteCache
+from stockdoc.charts import build_bar_graph, valuation_line_chart
+from stockdoc.dividends import build_dividends, fetch_dividends
+from stockdoc.metrics import adjust_for_splits, build_metrics, derived_metrics, select_periods, period_keys
+from stockdoc.valuation import VALUATION_METRICS, build_valuation
+from fixtures import FakeDatabase, install_yahoo, load_root, synthetic_root, ticker_names
+
+# Offline benchmark of the data and metrics pipeline against the local
+# Firebase/Yahoo stand-ins in fixtures.py:
+#
+#   python benchmarks/run.py [--sizes 1 10 50] [--repeat 3] [--latency-ms 0]
+#                            [--fixtures export.json] [--no-record] [--compare]
+#
+# Each run appends one line per stage and size to benchmarks/results.jsonl,
+# tagged with the current commit, so --compare can show the change against the
+# previous commit that was benchmarked.
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.jsonl')
+SIZES = [1, 10, 50]
+
+
+def commit():
+    try:
+        head = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(RESULTS)).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True, cwd=os.path.dirname(RESULTS)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+    return f'{head}-dirty' if dirty else head
+
+
+def timed(func, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+
+    return times
+
+
+def fresh_dir(path):
+    def setup():
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+    return setup
+
+
+def single_stock_charts(metrics, dividends, fast):
+    table = metrics['quarter']
+    keys = period_keys(table, True)
+    view = select_periods(table, True, keys[0], keys[-1])
+    build_bar_graph(view[['Revenue', 'Net Income']], 'Revenue and Net Income', fast)
+    build_bar_graph(view['Revenue Growth %'], 'Revenue growth %', fast)
+    build_bar_graph(view['Adjusted Shares'].rename('Shares'), 'Shares Outstanding', fast)
+    build_bar_graph(view[['Gross Margin', 'Net Margin']], 'Gross and Net Margin %', fast)
+    build_bar_graph(view[['EBITDA', 'EBIT', 'FCF', 'Interest']], 'EBITDA, EBIT, FCF vs Interest Expense', fast)
+    build_bar_graph(view[['Cash', 'Debt']], 'Cash vs Long Debt', fast)
+    build_bar_graph(view['CAPEX'], 'CAPEX', fast)
+    if not dividends['payments'].empty:
+        build_bar_graph(dividends['quarter'], 'Dividends per Share', fast)
+
+
+def run_size(root, tickers, repeat, latency, workdir):
+    db = FakeDatabase(root, latency=latency)
+    install_yahoo(latency=latency)
+    snapshots.SNAPSHOT_DIR = os.path.join(workdir, 'snapshots')
+    reset_snapshots = fresh_dir(snapshots.SNAPSHOT_DIR)
+
+    stages = {}
+    stages['fundamentals cold'] = timed(lambda: [snapshots.load_fundamentals(db, t) for t in tickers],
+                                        repeat, reset_snapshots)
+    stages['fundamentals warm'] = timed(lambda: [snapshots.load_fundamentals(db, t) for t in tickers], repeat)
+
+    shared = SharedCache(SQLiteCache(os.path.join(workdir, 'cache.sqlite')))
+    cached_fundamentals = shared.cached('fundamentals')(lambda t: snapshots.load_fundamentals(db, t))
+    for t in tickers:
+        cached_fundamentals(t)
+    stages['fundamentals shared cache'] = timed(lambda: [cached_fundamentals(t) for t in tickers], repeat)
+
+    stages['dividends'] = timed(lambda: [build_dividends(fetch_dividends(db, t)) for t in tickers], repeat)
+
+    stages['prices cold'] = timed(lambda: [snapshots.update_prices(t) for t in tickers], repeat, reset_snapshots)
+    stages['prices incremental'] = timed(lambda: [snapshots.update_prices(t) for t in tickers], repeat)
+
+    fundamentals = {t: snapshots.load_fundamentals(db, t) for t in tickers}
+    quarterly = {t: derived_metrics(q, quarter=True) for t, (_, q) in fundamentals.items()}
+    annual = {t: derived_metrics(a, quarter=False) for t, (a, _) in fundamentals.items()}
+    stages['split adjustment'] = timed(lambda: [(adjust_for_splits(quarterly[t]['Shares']),
+                                                 adjust_for_splits(annual[t]['Shares'],
+                                                                   reference=quarterly[t]['Shares']))
+                                                for t in tickers], repeat)
+    stages['metrics'] = timed(lambda: [build_metrics(*fundamentals[t]) for t in tickers], repeat)
+
+    metrics = {t: build_metrics(*fundamentals[t]) for t in tickers}
+    prices = {t: snapshots.update_prices(t) for t in tickers}
+    stages['valuation (6 multiples)'] = timed(lambda: [build_valuation(metrics[t]['quarter'], prices[t])
+                                                       for t in tickers], repeat)
+
+    dividends = {t: build_dividends(fetch_dividends(db, t)) for t in tickers}
+    for fast, name in [(False, 'bar charts px'), (True, 'bar charts fast')]:
+        stages[name] = timed(lambda: [single_stock_charts(metrics[t], dividends[t], fast) for t in tickers], repeat)
+
+    valuations = {t: build_valuation(metrics[t]['quarter'], prices[t]) for t in tickers}
+    metric = list(VALUATION_METRICS)[0]
+    final = pd.DataFrame({t: valuations[t][metric].dropna() for t in tickers})
+    stages['valuation line chart'] = timed(lambda: valuation_line_chart(final), repeat)
+
+    return stages
+
+
+def record(rows):
+    with open(RESULTS, 'a') as f:
+        for row in rows:
+            f.write(json.dumps(row) + '\n')
+
+
+def previous_results(current):
+    # Latest result per (stage, size) from the last other commit benchmarked
+    if not os.path.exists(RESULTS):
+        return {}
+    with open(RESULTS) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    others = [row for row in rows if row['commit'] != current]
+    if not others:
+        return {}
+    last_commit = others[-1]['commit']
+
+    return {(row['stage'], row['tickers']): row for row in others if row['commit'] == last_commit}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the data and metrics pipeline offline')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='ticker counts to run')
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per stage (the minimum is reported)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='simulated round trip per upstream call')
+    parser.add_argument('--fixtures', help='Firebase export (JSON) to use instead of synthetic fixtures')
+    parser.add_argument('--no-record', action='store_true', help=f'do not append to {os.path.basename(RESULTS)}')
+    parser.add_argument('--compare', action='store_true', help='show the change against the previous commit')
+    args = parser.parse_args()
+
+    if args.fixtures:
+        root = load_root(args.fixtures)
+        universe = list(root['allnames']['list']['names'])
+    else:
+        universe = ticker_names(max(args.sizes))
+        root = synthetic_root(universe)
+
+    current = commit()
+    baseline = previous_results(current) if args.compare else {}
+    rows = []
+    workdir = tempfile.mkdtemp(prefix='stockdoc-bench-')
+    try:
+        for size in args.sizes:
+            tickers = universe[:size]
+            stages = run_size(root, tickers, args.repeat, args.latency_ms / 1000, os.path.join(workdir, str(size)))
+            for stage, times in stages.items():
+                rows.append({'commit': current, 'ts': time.time(), 'python': platform.python_version(),
+                             'pandas': pd.__version__, 'tickers': len(tickers), 'stage': stage,
+                             'latency_ms': args.latency_ms, 'repeat': args.repeat,
+                             'min': min(times), 'median': statistics.median(times)})
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    table = pd.DataFrame(rows).pivot(index='stage', columns='tickers', values='min') * 1000
+    table = table.reindex(list(dict.fromkeys(row['stage'] for row in rows)))
+    print(f'{current}: min of {args.repeat} runs, ms')
+    print(table.round(2).to_string())
+
+    if baseline:
+        changes = pd.DataFrame([{'stage': row['stage'], 'tickers': row['tickers'],
+                                 'ratio': row['min'] / baseline[row['stage'], row['tickers']]['min']}
+                                for row in rows if (row['stage'], row['tickers']) in baseline])
+        if not changes.empty:
+            print(f'\nvs {next(iter(baseline.values()))["commit"]} (new / old)')
+            print(changes.pivot(index='stage', columns='tickers', values='ratio').round(2).to_string())
+
+    if not args.no_record:
+        record(rows)
+
+
+if __name__ == '__main__':
+    main()
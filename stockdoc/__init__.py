@@ -0,0 +1,9 @@
+import os
+
+# Data and metrics core of the app: loaders, metrics, valuation and charts.
+# Everything but loaders and pages works without Streamlit, and the scraping
+# and Firebase clients are only imported by the functions that use them.
+#
+# Local state (snapshots, artifacts, the shared cache file) lives at the
+# repository root, next to the app.
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
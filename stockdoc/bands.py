@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Where a multiple sits against its own history: percentile bands, min/max,
+# mean/std and the z-score and percentile rank of each day's value, over a
+# trailing window of trading days or the whole history so far.
+#
+# ValuationBands keeps the series it last saw along with its stats. On update
+# only the days from the first changed value onwards are computed: a new price
+# bar adds one day, and a new quarter only changes the days since the previous
+# one (the TTM metric is interpolated up to today).
+
+BAND_WINDOWS = {'1Y': 252, '3Y': 756, '5Y': 1260, '10Y': 2520, 'All': None}
+BAND_QUANTILES = {'p10': 0.10, 'p25': 0.25, 'median': 0.50, 'p75': 0.75, 'p90': 0.90}
+BAND_COLUMNS = [*BAND_QUANTILES, 'min', 'max', 'mean', 'std', 'zscore', 'percentile']
+# Stats stay NaN until a window holds at least this many days
+MIN_PERIODS = 20
+
+
+def first_changed(old, new):
+    # Position in new of the first day that isn't already in old unchanged
+    n = min(len(old), len(new))
+    if n == 0:
+        return 0
+    same = (old.index[:n] == new.index[:n]) & np.isclose(old.to_numpy()[:n], new.to_numpy()[:n], rtol=1e-12,
+                                                          atol=0, equal_nan=True)
+    changed = np.flatnonzero(~same)
+
+    return int(changed[0]) if len(changed) else n
+
+
+def window_stats(values, window, start=0):
+    # Rolling (window days) or expanding (window None) stats for values[start:],
+    # reading only the window - 1 days before start
+    lo = 0 if window is None else max(start - window + 1, 0)
+    part = values.iloc[lo:]
+    if window is None:
+        roll = part.expanding(min_periods=MIN_PERIODS)
+    else:
+        roll = part.rolling(window, min_periods=min(window, MIN_PERIODS))
+
+    stats = pd.DataFrame({name: roll.quantile(q) for name, q in BAND_QUANTILES.items()})
+    stats['min'] = roll.min()
+    stats['max'] = roll.max()
+    stats['mean'] = roll.mean()
+    stats['std'] = roll.std()
+    stats['percentile'] = roll.rank(pct=True) * 100
+
+    return stats.iloc[start - lo:]
+
+
+def sorted_quantile(ordered, q):
+    # Linear interpolation between closest ranks, as pandas and numpy do
+    position = q * (len(ordered) - 1)
+    below = int(np.floor(position))
+    above = min(below + 1, len(ordered) - 1)
+
+    return ordered[below] + (ordered[above] - ordered[below]) * (position - below)
+
+
+class ValuationBands:
+    def __init__(self, window=None):
+        self.window = window
+        self.values = pd.Series(dtype='float64')
+        self.stats = pd.DataFrame(columns=BAND_COLUMNS, dtype='float64')
+        # expanding window only: every value seen so far, sorted, plus running sums
+        self.ordered = np.empty(0)
+        self.total = 0.0
+        self.squares = 0.0
+
+    def _expanding_tail(self, values, start):
+        prefix = values.to_numpy()[:start]
+        self.ordered = np.sort(prefix)
+        self.total = float(prefix.sum())
+        self.squares = float((prefix ** 2).sum())
+
+        rows = []
+        for value in values.to_numpy()[start:]:
+            self.ordered = np.insert(self.ordered, np.searchsorted(self.ordered, value), value)
+            self.total += value
+            self.squares += value ** 2
+            n = len(self.ordered)
+            if n < MIN_PERIODS:
+                rows.append([np.nan] * (len(BAND_QUANTILES) + 5))
+                continue
+            mean = self.total / n
+            std = np.sqrt(max(self.squares - n * mean ** 2, 0.0) / (n - 1))
+            below = np.searchsorted(self.ordered, value, side='left')
+            through = np.searchsorted(self.ordered, value, side='right')
+            rows.append([*(sorted_quantile(self.ordered, q) for q in BAND_QUANTILES.values()),
+                         self.ordered[0], self.ordered[-1], mean, std, (below + through + 1) / 2 / n * 100])
+
+        return pd.DataFrame(rows, index=values.index[start:],
+                            columns=[*BAND_QUANTILES, 'min', 'max', 'mean', 'std', 'percentile'])
+
+    def update(self, series):
+        series = series.dropna().astype('float64')
+        start = first_changed(self.values, series)
+        if start == len(series) and start == len(self.values):
+            return self.stats
+
+        if self.window is None and start > 0:
+            tail = self._expanding_tail(series, start)
+        else:
+            tail = window_stats(series, self.window, start)
+            if self.window is None:
+                self.ordered = np.sort(series.to_numpy())
+                self.total = float(series.sum())
+                self.squares = float((series ** 2).sum())
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tail['zscore'] = (series.iloc[start:] - tail['mean']) / tail['std']
+        self.stats = pd.concat([self.stats.iloc[:start], tail[BAND_COLUMNS]])
+        self.values = series
+
+        return self.stats
+
+
+class BandStore:
+    # One ValuationBands per (ticker, metric, window), shared across reruns and
+    # sessions. Only the max_entries most recently used are kept (each holds the
+    # daily series and its stats); the store lock only guards the lookup, and
+    # updates to different keys run in parallel under their own locks.
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.bands = OrderedDict()
+        self.lock = threading.Lock()
+
+    def update(self, ticker, metric, window, series):
+        key = (ticker, metric, window)
+        with self.lock:
+            entry = self.bands.get(key)
+            if entry is None:
+                entry = self.bands[key] = (ValuationBands(BAND_WINDOWS[window]), threading.Lock())
+                while len(self.bands) > self.max_entries:
+                    self.bands.popitem(last=False)
+            else:
+                self.bands.move_to_end(key)
+
+        bands, lock = entry
+        with lock:
+            return bands.update(series)
+
+
+def band_summary(series, stats):
+    # Latest value against its window, one row per ticker in the summary table
+    latest = stats.iloc[-1]
+
+    return {'Current': series.iloc[-1], 'Median': latest['median'], 'P10': latest['p10'], 'P90': latest['p90'],
+            'Min': latest['min'], 'Max': latest['max'], 'Z-score': latest['zscore'],
+            'Percentile': latest['percentile']}
@@ -0,0 +1,310 @@
+import os
+import time
+import pickle
+import sqlite3
+import threading
+import functools
+from collections import Counter, defaultdict
+from contextlib import closing
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
+
+from . import ROOT_DIR
+
+# Cache shared by every app process/replica, behind the per-process
+# st.cache_resource layer. Entries are pickled and stored with the time they were
+# fetched; each source has its own TTL plus a stale window during which the
+# old value is served while a background thread refetches it.
+#
+# STOCKDOC_CACHE_URL selects the backend: a redis:// URL for Redis (or anything
+# speaking its protocol), otherwise a path for the local SQLite file.
+
+CACHE_TTLS = {
+    # source: (ttl, stale window) in seconds
+    'fundamentals': (57600, 3600),
+    'stats': (57600, 3600),
+    'prices': (21600, 1800),
+    'dividends': (57600, 3600),
+}
+
+# Seconds the per-process st.cache_resource layer keeps what it read from here.
+# A value served stale is held that long after its refresh has started, so the
+# oldest data a page shows is ttl + stale window + LOCAL_TTL: the windows are
+# kept short so that stays within the old single TTLs (18h, 8h for prices).
+LOCAL_TTL = 3600
+
+
+# Seconds of staleness allowed in an entry's access time (SQLite backend)
+ACCESS_RESOLUTION = 60
+
+
+class SQLiteCache:
+    def __init__(self, path, max_bytes=512 * 2**20):
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB, size INTEGER, '
+                         'stored REAL, expires REAL, accessed REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key):
+        # A hit only writes its access time back when the stored one is more
+        # than ACCESS_RESOLUTION seconds old, so most reads take no write lock;
+        # eviction order is only that precise
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute('SELECT value, stored, accessed FROM entries WHERE key = ? AND expires > ?',
+                               (key, now)).fetchone()
+            if row is None:
+                return None
+            if now - row[2] > ACCESS_RESOLUTION:
+                conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+
+        return row[1], pickle.loads(row[0])
+
+    def set(self, key, stored, value, expire):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                         (key, blob, len(blob), stored, stored + expire, time.time()))
+            self._evict(conn)
+
+    def _evict(self, conn):
+        conn.execute('DELETE FROM entries WHERE expires <= ?', (time.time(),))
+        total = 0
+        stale_keys = []
+        for key, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed DESC'):
+            total += size
+            if total > self.max_bytes:
+                stale_keys.append((key,))
+        conn.executemany('DELETE FROM entries WHERE key = ?', stale_keys)
+
+    def delete(self, key):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+
+
+class RedisCache:
+    # Works with any client exposing the redis-py get/set/delete and sorted set
+    # commands, so a local stand-in can replace the server.
+    def __init__(self, client, max_entries=5000, prefix='stockdoc:'):
+        self.client = client
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self.lru = f'{prefix}lru'
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        self.client.zadd(self.lru, {key: time.time()})
+
+        return pickle.loads(raw)
+
+    def set(self, key, stored, value, expire):
+        self.client.set(self.prefix + key, pickle.dumps((stored, value), protocol=pickle.HIGHEST_PROTOCOL),
+                        ex=max(int(expire), 1))
+        self.client.zadd(self.lru, {key: time.time()})
+
+        excess = self.client.zcard(self.lru) - self.max_entries
+        if excess > 0:
+            for old_key in self.client.zrange(self.lru, 0, excess - 1):
+                old_key = old_key.decode() if isinstance(old_key, bytes) else old_key
+                self.client.delete(self.prefix + old_key)
+                self.client.zrem(self.lru, old_key)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+        self.client.zrem(self.lru, key)
+
+
+class SharedCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.counters = defaultdict(Counter)
+        self.refreshing = set()
+        self.lock = threading.Lock()
+
+    def count(self, source, event):
+        with self.lock:
+            self.counters[source][event] += 1
+
+    def stats(self):
+        with self.lock:
+            return {source: dict(counter) for source, counter in self.counters.items()}
+
+    def _read(self, source, key):
+        try:
+            return self.backend.get(key)
+        except Exception:
+            self.count(source, 'error')
+            return None
+
+    def _write(self, source, key, value, expire):
+        try:
+            self.backend.set(key, time.time(), value, expire)
+        except Exception:
+            self.count(source, 'error')
+
+    def _refresh(self, source, key, func, args, expire):
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def run():
+            try:
+                self._write(source, key, func(*args), expire)
+            except Exception:
+                self.count(source, 'error')
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def invalidate(self, source, *args):
+        try:
+            self.backend.delete(':'.join([source, *map(str, args)]))
+        except Exception:
+            self.count(source, 'error')
+
+    def cached(self, source):
+        ttl, stale_ttl = CACHE_TTLS[source]
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                key = ':'.join([source, *map(str, args)])
+                entry = self._read(source, key)
+                if entry is not None:
+                    stored, value = entry
+                    age = time.time() - stored
+                    if age < ttl:
+                        self.count(source, 'hit')
+                        return value
+                    if age < ttl + stale_ttl:
+                        self.count(source, 'stale')
+                        self._refresh(source, key, func, args, ttl + stale_ttl)
+                        return value
+
+                self.count(source, 'miss')
+                value = func(*args)
+                self._write(source, key, value, ttl + stale_ttl)
+
+                return value
+
+            wrapper.invalidate = lambda *args: self.invalidate(source, *args)
+
+            return wrapper
+
+        return decorator
+
+
+def _freeze_frame(value):
+    # Relies on pandas internals (blocks behind _mgr), checked by
+    # FREEZE_SUPPORTED below. Consolidate first, or the next column lookup
+    # would build new, writable blocks.
+    value._consolidate_inplace()
+    for array in value._mgr.arrays:
+        array = getattr(array, '_ndarray', array)
+        if isinstance(array, np.ndarray):
+            array.flags.writeable = False
+
+
+def _freeze_supported():
+    probe = pd.DataFrame({'a': [1.0, 2.0], 'b': [1, 2]})
+    try:
+        _freeze_frame(probe)
+        probe.iloc[0, 0] = 0.0
+    except ValueError:
+        return True
+    except Exception:
+        return False
+
+    return False
+
+
+# Off if this pandas lays frames out differently; view() then deep-copies
+FREEZE_SUPPORTED = _freeze_supported()
+
+
+def freeze(value):
+    # Loaded frames are served to every session as the same object (no copy on
+    # a cache hit), so their buffers are made read-only: a cell write raises
+    # instead of changing what the next session sees. Structural changes
+    # (assigning or dropping a column, renaming) don't touch the buffers, which
+    # is what view() is for.
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        if FREEZE_SUPPORTED:
+            _freeze_frame(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            freeze(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            freeze(item)
+
+    return value
+
+
+def view(value):
+    # What each caller gets from a frozen cached value: a shallow copy of every
+    # frame with its own axes, so column assignment, drops and renames only
+    # change the caller's copy, and read-only mappings and tuples for bundles.
+    # The data itself is shared.
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        if not FREEZE_SUPPORTED:
+            return value.copy()
+        copied = value.copy(deep=False)
+        copied.index = value.index.copy(deep=False)
+        if isinstance(value, pd.DataFrame):
+            copied.columns = value.columns.copy(deep=False)
+        return copied
+    if isinstance(value, (dict, MappingProxyType)):
+        return MappingProxyType({key: view(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(view(item) for item in value)
+
+    return value
+
+
+def frozen(func):
+    @functools.wraps(func)
+    def wrapper(*args):
+        return freeze(func(*args))
+
+    return wrapper
+
+
+def viewed(func):
+    # Goes outside the st.cache_resource layer, so it runs on every call
+    @functools.wraps(func)
+    def wrapper(*args):
+        return view(func(*args))
+
+    if hasattr(func, 'clear'):
+        wrapper.clear = func.clear
+
+    return wrapper
+
+
+def backend_from_env():
+    url = os.environ.get('STOCKDOC_CACHE_URL', os.path.join(ROOT_DIR, '.cache', 'stockdoc.sqlite'))
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        import redis
+
+        return RedisCache(redis.Redis.from_url(url))
+
+    max_mb = int(os.environ.get('STOCKDOC_CACHE_MAX_MB', 512))
+
+    return SQLiteCache(url, max_bytes=max_mb * 2**20)
+
+
+shared_cache = SharedCache(backend_from_env())
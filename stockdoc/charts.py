@@ -0,0 +1,238 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+
+from .tracing import tracer
+
+# Built figures are kept per process, keyed on a hash of the frame's contents
+# plus everything that changes the layout, so a rerun that didn't touch a
+# chart's data reuses the figure instead of rebuilding it with plotly express.
+FIGURE_CACHE_SIZE = 512
+# Opt-in: build bar traces directly with a trimmed template instead of
+# px.bar + plotly_white, which serialises the whole template with every chart.
+FAST_CHARTS = os.environ.get('STOCKDOC_FAST_CHARTS', '') not in ('', '0')
+
+COLORS = qualitative.D3
+
+AXIS = dict(gridcolor='#EBF0F8', linecolor='#EBF0F8', zerolinecolor='#EBF0F8', zerolinewidth=2,
+            ticks='', automargin=True, title=dict(standoff=15))
+LIGHT_TEMPLATE = go.layout.Template(layout=dict(
+    font=dict(color='#2a3f5f'),
+    paper_bgcolor='white',
+    plot_bgcolor='white',
+    hovermode='closest',
+    hoverlabel=dict(align='left'),
+    colorway=COLORS,
+    xaxis=AXIS,
+    yaxis=AXIS,
+))
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+
+def frame_key(df):
+    digest = hashlib.blake2b(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes(), digest_size=16)
+    names = list(df.columns) if isinstance(df, pd.DataFrame) else [df.name]
+    digest.update(repr((names, df.index.name, str(df.index.dtype))).encode())
+
+    return digest.hexdigest()
+
+
+def cached_figure(key, build):
+    with _lock:
+        figure = _figures.get(key)
+        if figure is not None:
+            _figures.move_to_end(key)
+            return figure
+
+    figure = build()
+    with _lock:
+        _figures[key] = figure
+        while len(_figures) > FIGURE_CACHE_SIZE:
+            _figures.popitem(last=False)
+
+    return figure
+
+
+def bar_layout(title):
+    width = 450
+    if title == 'Dividends per Share':
+        width = 900
+
+    return dict(title=f'{title}', width=width)
+
+
+def bar_traces(df):
+    frame = df.to_frame() if isinstance(df, pd.Series) else df
+    x = [str(label) for label in frame.index]
+
+    return [go.Bar(x=x, y=frame[column].to_numpy(), name=str(column), marker_color=COLORS[i % len(COLORS)])
+            for i, column in enumerate(frame.columns)]
+
+
+@tracer.computed('bar_graph')
+def build_bar_graph(df, title, fast=False):
+    if fast:
+        bar_chart = go.Figure(data=bar_traces(df), layout=dict(template=LIGHT_TEMPLATE, barmode='group',
+                                                               **bar_layout(title)))
+    else:
+        import plotly.express as px
+
+        bar_chart = px.bar(
+            df,
+            color_discrete_sequence=COLORS,
+            orientation='v',
+            barmode='group',
+            template='plotly_white',
+            **bar_layout(title))
+
+    bar_chart.update_layout(plot_bgcolor='rgba(0,0,0,0)',
+                            xaxis=dict(title=''),
+                            yaxis=dict(title=''),
+                            hoverlabel=dict(font=dict(color='white')),
+                            bargroupgap=0.15,
+                            bargap=0.25
+                            )
+
+    if title == 'Shares Outstanding':
+        min = df.min()*0.95
+        max = df.max()
+        bar_chart.update_yaxes(range=[min, max])
+
+    return bar_chart
+
+
+@tracer.traced('bar_graph')
+def bar_graph(df, title, fast=FAST_CHARTS):
+    key = (frame_key(df), title, fast)
+
+    return cached_figure(key, lambda: build_bar_graph(df, title, fast=fast))
+
+
+# Long daily series are thinned to about one point per horizontal pixel before
+# plotting. Downsampling runs on whatever range the caller passes in, so a
+# narrower date range gets finer detail.
+LINE_CHART_POINTS = 1200
+
+
+def lttb_indices(x, y, points):
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and, from
+    # each bucket in between, the point forming the largest triangle with the
+    # previously kept point and the average of the next bucket.
+    n = len(y)
+    if points >= n or points < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (points - 2)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    a = 0
+    for i in range(points - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if end < next_end:
+            avg_x = x[end:next_end].mean()
+            avg_y = y[end:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    selected[-1] = n - 1
+
+    return selected
+
+
+def minmax_indices(y, points):
+    # Keeps the lowest and highest point of each bucket, plus both ends
+    n = len(y)
+    if points >= n or points < 4:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, points // 2).astype(np.int64)
+    selected = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            selected.append(start + int(y[start:end].argmin()))
+            selected.append(start + int(y[start:end].argmax()))
+
+    return np.unique(selected)
+
+
+def downsample(series, points=LINE_CHART_POINTS, method='lttb'):
+    series = series.dropna()
+    y = series.to_numpy(dtype='float64')
+    if method == 'minmax':
+        selected = minmax_indices(y, points)
+    else:
+        x = pd.to_datetime(series.index).to_numpy(dtype='datetime64[ns]').view('int64').astype('float64')
+        selected = lttb_indices(x, y, points)
+
+    return series.iloc[selected]
+
+
+def rgba(color, alpha):
+    red, green, blue = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+
+    return f'rgba({red},{green},{blue},{alpha})'
+
+
+def add_bands(linegraph, name, stats, color, points=LINE_CHART_POINTS):
+    # p25-p75 shaded and the median dashed, behind the ticker's own line. The
+    # bands are smooth, so an even stride is enough to thin them.
+    stats = stats.dropna(subset=['p25', 'median', 'p75'])
+    if stats.empty:
+        return
+    step = max(len(stats) // points, 1)
+    stats = pd.concat([stats.iloc[:-1:step], stats.iloc[[-1]]])
+
+    linegraph.add_scatter(x=stats.index, y=stats['p75'].to_numpy(), mode='lines', line=dict(width=0),
+                          hoverinfo='skip', showlegend=False)
+    linegraph.add_scatter(x=stats.index, y=stats['p25'].to_numpy(), mode='lines', line=dict(width=0),
+                          fill='tonexty', fillcolor=rgba(color, 0.15), name=f'{name} p25-p75', showlegend=False)
+    linegraph.add_scatter(x=stats.index, y=stats['median'].to_numpy(), mode='lines', name=f'{name} median',
+                          line=dict(color=rgba(color, 0.7), width=1, dash='dash'), showlegend=False)
+
+
+@tracer.traced('valuation_line_chart')
+def valuation_line_chart(final, points=LINE_CHART_POINTS, method='lttb', bands=None):
+    lines = {column: downsample(final[column], points, method) for column in final.columns}
+    lines = {column: line for column, line in lines.items() if not line.empty}
+
+    # One trace per ticker on its own sample dates, so no trace carries the
+    # other tickers' dates as gaps
+    linegraph = go.Figure(layout=dict(template='plotly_dark'))
+    for i, name in enumerate(lines):
+        if bands is not None and name in bands:
+            add_bands(linegraph, name, bands[name], COLORS[i % len(COLORS)], points)
+    for i, (name, line) in enumerate(lines.items()):
+        color = COLORS[i % len(COLORS)]
+        linegraph.add_scatter(x=line.index, y=line.to_numpy(), mode='lines', name=name,
+                              line=dict(color=color, width=2))
+    for i, (name, line) in enumerate(lines.items()):
+        color = COLORS[i % len(COLORS)]
+        linegraph.add_scatter(x=[line.index[-1]], y=[line.iloc[-1]],
+                              mode='markers+text',
+                              text=f"{line.iloc[-1].round(2)} {name}",
+                              textfont=dict(color=color),
+                              textposition='middle right',
+                              marker=dict(color=color, size=12),
+                              showlegend=False)
+
+    linegraph.update_layout(plot_bgcolor='rgba(0,0,0,0)',
+                            xaxis=dict(title=''),
+                            yaxis=dict(title=''),
+                            hoverlabel=dict(font=dict(color='white')),
+                            width=1200,
+                            height=500,
+                            showlegend=False
+                            )
+
+    return linegraph
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+
+from .snapshots import firebase_records
+
+# Dividend history per ticker, parsed once from the Firebase 'dividends' node
+# into a float64 series of payments indexed by date. Everything the single-stock
+# view shows is derived from it up front, so switching Annual/Quarter or moving
+# the slider only picks between ready-made series.
+
+
+def records_to_dividends(records):
+    # Tickers without dividends are stored as a single {'index': 'empty'} record
+    if not records or records[0].get('index') == 'empty':
+        return pd.Series([], index=pd.DatetimeIndex([], name='date'), name='dividend', dtype='float64')
+
+    df = pd.DataFrame.from_records(records)
+    dates = pd.to_datetime(df['index']).dt.tz_localize(None)
+    amounts = pd.to_numeric(df['dividend'].replace('None', pd.NA), errors='coerce').fillna(0).astype('float64')
+
+    series = pd.Series(amounts.to_numpy(), index=pd.DatetimeIndex(dates, name='date'), name='dividend')
+
+    return series.sort_index(kind='stable')
+
+
+def fetch_dividends(db, ticker):
+    node = db.child('dividends').child(ticker).get().val()
+    if node is None:
+        raise KeyError(ticker)
+
+    return records_to_dividends(firebase_records(node))
+
+
+def build_dividends(payments):
+    # quarter: one bar per payment labelled by its quarter, annual: calendar
+    # year sums, ttm: the last four payments (NaN until there are four)
+    quarter = pd.Series(payments.to_numpy(), name='dividend',
+                        index=pd.Index(payments.index.to_period('Q').strftime('Q%q %Y'), name='index'))
+    annual = payments.groupby(payments.index.strftime('%Y')).sum().rename_axis('index')
+    ttm = payments.iloc[-4:].sum() if len(payments) >= 4 else np.float64(np.nan)
+
+    return {'payments': payments, 'quarter': quarter, 'annual': annual, 'ttm': ttm}
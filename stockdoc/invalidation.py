@@ -0,0 +1,144 @@
+import os
+import json
+import hashlib
+import threading
+import functools
+from collections import Counter
+
+from .cache import shared_cache
+from .snapshots import sync_ticker
+
+# Push-based invalidation for the Firebase-backed loaders. A listener streams
+# the year, quarter, dividends and allnames nodes; when the ingest job writes
+# to a ticker, that ticker's snapshot is resynced, its shared cache entries are
+# dropped and its data version is bumped. The version is part of the in-process
+# cache key, so the next read of that ticker misses while every other ticker
+# keeps its entry. With STOCKDOC_LIVE_UPDATES=1 the loaders run without a TTL
+# and the listener is the only thing that expires them.
+LIVE_UPDATES = os.environ.get('STOCKDOC_LIVE_UPDATES', '') not in ('', '0')
+WATCHED_NODES = ['year', 'quarter', 'dividends', 'allnames']
+
+# node -> the data kind whose version a write to it bumps
+NODE_KINDS = {'year': 'fundamentals', 'quarter': 'fundamentals', 'dividends': 'dividends', 'allnames': 'allnames'}
+
+
+class DataVersions:
+    def __init__(self):
+        self.versions = Counter()
+        self.lock = threading.Lock()
+
+    def get(self, kind, key=''):
+        with self.lock:
+            return self.versions[kind, key]
+
+    def bump(self, kind, key=''):
+        with self.lock:
+            self.versions[kind, key] += 1
+            return self.versions[kind, key]
+
+    def stamped(self, kind):
+        # Outermost: appends the current version of (kind, first argument) so a
+        # cache decorator below it keys on it
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args):
+                return func(*args, self.get(kind, args[0] if args else ''))
+
+            if hasattr(func, 'clear'):
+                wrapper.clear = func.clear
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def unstamped(func):
+        # Innermost: drops the version again before the loader itself
+        @functools.wraps(func)
+        def wrapper(*args):
+            return func(*args[:-1])
+
+        return wrapper
+
+
+data_versions = DataVersions()
+
+
+def apply_change(db, node, ticker, versions=data_versions, cache=shared_cache):
+    kind = NODE_KINDS[node]
+    if kind == 'fundamentals':
+        # Writes can restate existing periods, so refetch the ticker in full
+        # rather than only the appended rows
+        sync_ticker(db, ticker, full=True)
+        cache.invalidate('fundamentals', ticker)
+    elif kind == 'dividends':
+        cache.invalidate('dividends', ticker)
+
+    return versions.bump(kind, ticker if kind != 'allnames' else '')
+
+
+def digest(value):
+    return hashlib.blake2b(json.dumps(value, sort_keys=True, default=str).encode(), digest_size=16).digest()
+
+
+def changed_tickers(node, message, digests):
+    # pyrebase stream messages carry the path under the streamed node. A 'put'
+    # at the root is the whole node: the first message of each stream, and
+    # again every time the stream reconnects. Only tickers whose data differs
+    # from the last whole node seen count as changed; digests (ticker -> digest,
+    # None before the first message) is kept per stream and updated here. A
+    # ticker written since the last whole node is resynced once more on the
+    # next reconnect, which is harmless.
+    parts = [part for part in (message.get('path') or '/').split('/') if part]
+    data = message.get('data')
+
+    if not parts and message.get('event', 'put') == 'put':
+        current = {str(key): digest(value) for key, value in (data or {}).items()} if isinstance(data, dict) else {}
+        changed = [] if digests is None else [key for key in current.keys() | digests.keys()
+                                              if current.get(key) != digests.get(key)]
+        return current, (([''] if changed else []) if node == 'allnames' else sorted(changed))
+
+    if node == 'allnames':
+        return digests, ['']
+    if parts:
+        return digests, [parts[0]]
+
+    return digests, list(data) if isinstance(data, dict) else []
+
+
+class ChangeListener:
+    # connect opens a Firebase connection. Each stream gets one of its own and
+    # its handler resyncs tickers on it: pyrebase keeps the query being built
+    # on the Database object, so stream threads must not share one.
+    def __init__(self, connect, nodes=WATCHED_NODES, on_change=apply_change):
+        self.connect = connect
+        self.nodes = list(nodes)
+        self.on_change = on_change
+        self.streams = []
+        self.digests = {}
+        self.changes = Counter()
+        self.errors = Counter()
+
+    def _handler(self, node, db):
+        def handle(message):
+            self.digests[node], tickers = changed_tickers(node, message, self.digests.get(node))
+            for ticker in tickers:
+                try:
+                    self.on_change(db, node, ticker)
+                    self.changes[node] += 1
+                except Exception:
+                    self.errors[node] += 1
+
+        return handle
+
+    def start(self):
+        for node in self.nodes:
+            db = self.connect()
+            self.streams.append(db.child(node).stream(self._handler(node, db)))
+
+        return self
+
+    def close(self):
+        for stream in self.streams:
+            stream.close()
+        self.streams = []
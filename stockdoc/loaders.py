@@ -0,0 +1,248 @@
+import time
+import functools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from .bands import BandStore
+from .cache import LOCAL_TTL, frozen, shared_cache, viewed
+from .dividends import build_dividends, fetch_dividends
+from .invalidation import LIVE_UPDATES, ChangeListener, data_versions
+from .precompute import current_version, load_metrics, load_valuation, read_screener
+from .search import TickerIndex
+from .snapshots import ConnectionPool, connect_firebase, load_fundamentals, update_prices
+from .tracing import tracer
+
+# Every loader the pages use, each behind st.cache_resource (and the shared
+# cache where the source is remote). Cached frames are frozen once and each
+# call gets a view of them (see cache.freeze and cache.view). yahoo_fin and
+# pyrebase are imported by the loaders that call them, not when the app starts.
+#
+# The Firebase-backed loaders are keyed on their data version as well (see
+# invalidation.py). With live updates on they have no TTL; otherwise they
+# expire after FIREBASE_TTL, which like the other loaders over the shared cache
+# is LOCAL_TTL so a stale shared entry isn't held here for long.
+FIREBASE_TTL = None if LIVE_UPDATES else LOCAL_TTL
+
+
+# Firebase connections shared by the process; loaders running in worker
+# threads at once (get_data_many, the staged single-stock page) each check one
+# out instead of sharing a single pyrebase Database
+FIREBASE_CONNECTIONS = 8
+
+
+@st.cache_resource
+def firebase_pool():
+    return ConnectionPool(st.secrets["textkey"], FIREBASE_CONNECTIONS)
+
+
+@data_versions.stamped('fundamentals')
+@tracer.traced('fundamentals')
+@viewed
+@st.cache_resource(ttl=FIREBASE_TTL, max_entries=128)
+@frozen
+@tracer.computed('fundamentals')
+@data_versions.unstamped
+@shared_cache.cached('fundamentals')
+def get_fundamentals(ticker):
+    with firebase_pool().connection() as db:
+        dfannual, dfquarter = load_fundamentals(db, ticker)
+
+    return [dfannual, dfquarter]
+
+
+@tracer.traced('stats')
+@viewed
+@st.cache_resource(ttl=LOCAL_TTL, max_entries=128)
+@frozen
+@tracer.computed('stats')
+@shared_cache.cached('stats')
+def get_stats(ticker):
+    import yahoo_fin.stock_info as si
+
+    ticker_for_yahoo = ticker.replace('_', '-')
+    stats = si.get_stats_valuation(ticker_for_yahoo).fillna("-")
+
+    return stats
+
+
+@data_versions.stamped('allnames')
+@tracer.traced('ticker_list')
+@st.cache_data(ttl=FIREBASE_TTL)
+@tracer.computed('ticker_list')
+@data_versions.unstamped
+def get_ticker_list():
+    with firebase_pool().connection() as db:
+        reading = db.child('allnames').child('list').get().val()
+    alltickers = list(reading['names'])
+    tickerlist = ["", *alltickers]
+
+    return tickerlist
+
+
+@data_versions.stamped('dividends')
+@tracer.traced('dividends')
+@viewed
+@st.cache_resource(ttl=FIREBASE_TTL, max_entries=128)
+@frozen
+@tracer.computed('dividends')
+@data_versions.unstamped
+@shared_cache.cached('dividends')
+def get_dividends(ticker):
+    with firebase_pool().connection() as db:
+        payments = fetch_dividends(db, ticker)
+
+    return build_dividends(payments)
+
+
+@data_versions.stamped('allnames')
+@st.cache_resource(ttl=FIREBASE_TTL, max_entries=2)
+@data_versions.unstamped
+def get_ticker_index():
+    return TickerIndex(get_ticker_list())
+
+
+# Up to this many tickers the pickers list the whole universe until a search is
+# typed; beyond it they only ever hold the top PICKER_MATCHES search results.
+PICKER_FULL_LIST_LIMIT = 2000
+PICKER_MATCHES = 50
+
+
+def picker_options(query):
+    index = get_ticker_index()
+    if not query and len(index) <= PICKER_FULL_LIST_LIMIT:
+        return index.tickers
+
+    return index.search(query, k=PICKER_MATCHES)
+
+
+@tracer.traced('prices')
+@viewed
+@st.cache_resource(ttl=LOCAL_TTL, max_entries=128)
+@frozen
+@tracer.computed('prices')
+@shared_cache.cached('prices')
+def get_historical_prices(ticker):
+    prices = update_prices(ticker)
+
+    return prices
+
+
+@data_versions.stamped('fundamentals')
+@tracer.traced('metrics')
+@viewed
+@st.cache_resource(ttl=FIREBASE_TTL, max_entries=128)
+@frozen
+@tracer.computed('metrics')
+def get_metrics(ticker, version):
+    return load_metrics(ticker, version, get_fundamentals)
+
+
+def background_pool(max_workers):
+    # Worker threads need the session's script context to use the st caches
+    ctx = get_script_run_ctx()
+
+    return ThreadPoolExecutor(max_workers=max_workers, initializer=add_script_run_ctx, initargs=(None, ctx))
+
+
+def run_in_background(**calls):
+    pool = background_pool(len(calls))
+    futures = {name: pool.submit(*call) for name, call in calls.items()}
+    pool.shutdown(wait=False)
+
+    return futures
+
+
+# Seconds each fetch in get_data_many may run before it is given up on,
+# counted from when it starts rather than while it waits for a worker
+SOURCE_TIMEOUTS = {'fundamentals': 20, 'stats': 10, 'prices': 15}
+
+
+def get_data_many(tickers, stats=True, prices=True, max_workers=8):
+    # Returns the fundamentals and stats per ticker, the price table, and the
+    # (source, ticker) fetches that timed out, which callers report apart from
+    # tickers that aren't in the database
+    loaders = {'fundamentals': get_fundamentals}
+    if stats:
+        loaders['stats'] = get_stats
+    if prices:
+        loaders['prices'] = get_historical_prices
+
+    started = {}
+
+    def fetch(source, ticker):
+        started[source, ticker] = time.monotonic()
+        return loaders[source](ticker)
+
+    pool = background_pool(max_workers)
+    results = {}
+    timed_out = set()
+    try:
+        futures = {pool.submit(fetch, source, ticker): (source, ticker)
+                   for ticker in tickers for source in loaders}
+
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    results[futures[future]] = future.result()
+                except Exception:
+                    results[futures[future]] = None
+            now = time.monotonic()
+            for future in list(pending):
+                source, ticker = futures[future]
+                if now - started.get((source, ticker), now) > SOURCE_TIMEOUTS[source]:
+                    pending.discard(future)
+                    results[source, ticker] = None
+                    timed_out.add((source, ticker))
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    data = {}
+    for ticker in tickers:
+        fundamentals = results['fundamentals', ticker]
+        if fundamentals is None:
+            continue
+        data[ticker] = [*fundamentals, results.get(('stats', ticker))]
+
+    price_table = pd.DataFrame({ticker: results['prices', ticker] for ticker in data
+                                if results.get(('prices', ticker)) is not None})
+
+    return data, price_table, timed_out
+
+
+# version is the last quarter, the last price date and the data version, so new
+# data gets its own entry
+@tracer.traced('valuation')
+@viewed
+@st.cache_resource(ttl=LOCAL_TTL, max_entries=256)
+@frozen
+@tracer.computed('valuation')
+def get_valuation(ticker, version):
+    return load_valuation(ticker, version[2], get_historical_prices(ticker), lambda: get_metrics(ticker)['quarter'])
+
+
+# Keyed on the artifact version, so a newly published build is picked up
+@tracer.traced('screener')
+@st.cache_resource(ttl=3600, max_entries=2)
+@tracer.computed('screener')
+def get_screener(version):
+    return read_screener(version)
+
+
+def get_current_screener():
+    return get_screener(current_version())
+
+
+@st.cache_resource
+def get_band_store():
+    return BandStore()
+
+
+@st.cache_resource
+def start_change_listener():
+    # Connections of its own: the stream threads read Firebase alongside the
+    # loaders
+    return ChangeListener(functools.partial(connect_firebase, st.secrets["textkey"])).start()
@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+
+# Every series the views chart or quote, derived once per ticker and period
+# type from the get_data frames. Columns are float64 and indexed by endDate.
+
+FLOWS = {
+    'Revenue': 'totalRevenue',
+    'Cost of Revenue': 'costofGoodsAndServicesSold',
+    'Net Income': 'netIncome',
+    'Operating Income': 'operatingIncome',
+    'D&A': 'depreciationDepletionAndAmortization',
+    'EBT': 'incomeBeforeTax',
+    'Interest': 'interestExpense',
+    'Operating Cash Flow': 'operatingCashflow',
+    'CAPEX': 'capitalExpenditures',
+    'Dividend Payout': 'dividendPayout',
+}
+
+BALANCES = {
+    'Cash': 'cashAndShortTermInvestments',
+    'Total Assets': 'totalAssets',
+    'Equity': 'totalShareholderEquity',
+    'Shares': 'commonStockSharesOutstanding',
+}
+
+DERIVED_FLOWS = ['Gross Profit', 'EBIT', 'EBITDA', 'FCF']
+AVERAGED = ['Total Assets', 'Equity']
+# Every column of the tables build_metrics returns
+METRIC_COLUMNS = [*FLOWS, *BALANCES, 'Debt', *DERIVED_FLOWS,
+                  *(f'TTM {column}' for column in [*FLOWS, *DERIVED_FLOWS]),
+                  *(f'TTM Avg {column}' for column in AVERAGED),
+                  'Gross Margin', 'Net Margin', 'TTM Gross Margin', 'TTM Net Margin', 'TTM ROA', 'TTM ROE',
+                  'Revenue Growth %', 'Adjusted Shares']
+
+
+def derived_metrics(df, quarter):
+    fields = [*FLOWS.values(), *BALANCES.values(), 'longTermDebt', 'longTermDebtNoncurrent']
+    raw = df.reindex(columns=fields, fill_value=0).astype('float64')
+    raw.index = pd.DatetimeIndex(df['endDate'], name='endDate')
+
+    table = raw[[*FLOWS.values(), *BALANCES.values()]].set_axis([*FLOWS, *BALANCES], axis=1)
+
+    if (raw['longTermDebtNoncurrent'] == 0).all():
+        table['Debt'] = raw['longTermDebt']
+    else:
+        table['Debt'] = raw['longTermDebtNoncurrent']
+
+    table['Gross Profit'] = table['Revenue'] - table['Cost of Revenue']
+    table['EBIT'] = table['Operating Income']
+    table['EBITDA'] = table['Operating Income'] + table['D&A']
+    table['FCF'] = table['Operating Cash Flow'] - table['CAPEX']
+
+    # Trailing twelve months: four quarters summed, or the fiscal year itself
+    flows = [*FLOWS, *DERIVED_FLOWS]
+    if quarter:
+        ttm = table[flows].rolling(4).sum()
+        ttm_avg = table[AVERAGED].rolling(4).mean()
+    else:
+        ttm = table[flows]
+        ttm_avg = table[AVERAGED]
+    ttm = ttm.set_axis([f'TTM {column}' for column in flows], axis=1)
+    ttm_avg = ttm_avg.set_axis([f'TTM Avg {column}' for column in AVERAGED], axis=1)
+    table = pd.concat([table, ttm, ttm_avg], axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for prefix in ['', 'TTM ']:
+            table[f'{prefix}Gross Margin'] = (table[f'{prefix}Gross Profit'] / table[f'{prefix}Revenue']) * 100
+            table[f'{prefix}Net Margin'] = (table[f'{prefix}Net Income'] / table[f'{prefix}Revenue']) * 100
+        table['TTM ROA'] = (table['TTM Net Income'] / table['TTM Avg Total Assets']) * 100
+        table['TTM ROE'] = (table['TTM Net Income'] / table['TTM Avg Equity']) * 100
+        table['Revenue Growth %'] = table['Revenue'].pct_change() * 100
+
+    return table
+
+
+def build_metrics(dfannual, dfquarter):
+    annual = derived_metrics(dfannual, quarter=False)
+    quarter = derived_metrics(dfquarter, quarter=True)
+
+    quarter['Adjusted Shares'] = adjust_for_splits(quarter['Shares'])
+    annual['Adjusted Shares'] = adjust_for_splits(annual['Shares'], reference=quarter['Shares'])
+
+    return {'annual': annual, 'quarter': quarter}
+
+
+def period_keys(table, quarter):
+    if quarter:
+        return table.index.to_period('Q')
+    return table.index.year
+
+
+def period_labels(keys, quarter):
+    if quarter:
+        return keys.strftime('Q%q %Y')
+    return keys.astype(str)
+
+
+def select_periods(table, quarter, start, end):
+    keys = period_keys(table, quarter)
+    mask = (keys >= start) & (keys <= end)
+    return table[mask].set_axis(pd.Index(period_labels(keys[mask], quarter), name='endDate'))
+
+
+# A period-over-period share count jump above this ratio is treated as a split.
+# Jumps below THREE_FOR_TWO_LIMIT are read as 3-for-2 splits; larger ones are
+# rounded to the nearest whole factor.
+SPLIT_THRESHOLD = 1.5
+THREE_FOR_TWO_LIMIT = 1.75
+
+
+def split_ratios(shares, threshold=SPLIT_THRESHOLD):
+    values = shares.to_numpy(dtype='float64')
+    ratios = np.full(len(values), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios[1:] = np.where(values[:-1] > 0, values[1:] / values[:-1], np.nan)
+
+    return pd.Series(np.where(ratios > threshold, ratios, np.nan), index=shares.index).dropna()
+
+
+def split_factors(ratios):
+    return pd.Series(np.where(ratios < THREE_FOR_TWO_LIMIT, 1.5, ratios.round()), index=ratios.index)
+
+
+def adjust_for_splits(shares, reference=None, threshold=SPLIT_THRESHOLD):
+    # Back-adjusts every period onto the share basis of the latest one. Each split
+    # multiplies all earlier periods by its rounded ratio, so the adjustment for a
+    # period is the product of the factors of every split after it.
+    #
+    # reference is a finer-grained share series (quarterly for annual shares):
+    # a split seen in both takes its factor from the reference, since the coarse
+    # ratio also includes a year's worth of issuance and buybacks.
+    #
+    # This matches the loops it replaced for whole-number splits. They differ on
+    # purpose where those loops went wrong: a 3-for-2 split counted as 2x, a
+    # non-integer split followed by another was re-measured after the partial
+    # adjustment (1.56x then 3.02x gave 4x, not 1.5 * 3), and a zero share count
+    # turned every earlier period into inf. tests/test_splits.py pins both.
+    splits = split_ratios(shares, threshold)
+    dates = shares.index.to_numpy()
+    factors = split_factors(splits)
+
+    if reference is not None and not splits.empty:
+        reference_splits = split_factors(split_ratios(reference, threshold))
+        reference_dates = reference_splits.index.to_numpy()
+        for date in splits.index:
+            window_start = dates[dates.searchsorted(date.to_datetime64()) - 1]
+            inside = (reference_dates > window_start) & (reference_dates <= date.to_datetime64())
+            if inside.any():
+                factors[date] = reference_splits[inside].prod()
+
+    # cumulative product of the factors from the latest split backwards
+    tail = np.append(np.cumprod(factors.to_numpy()[::-1])[::-1], 1.0)
+    adjustment = tail[factors.index.to_numpy().searchsorted(dates, side='right')]
+
+    return shares * adjustment
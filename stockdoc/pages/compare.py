@@ -0,0 +1,148 @@
+import pandas as pd
+import streamlit as st
+from streamlit_option_menu import option_menu
+
+from ..charts import bar_graph, valuation_line_chart
+from ..bands import BAND_WINDOWS, band_summary
+from ..invalidation import data_versions
+from ..loaders import get_band_store, get_data_many, get_metrics, get_valuation
+from ..metrics import period_keys, select_periods
+from ..valuation import VALUATION_METRICS
+
+
+def render(tickers):
+    final = pd.DataFrame()
+    compare_data, compare_prices, timed_out = get_data_many(tickers, stats=False)
+    for ticker in tickers:
+        if ('fundamentals', ticker) in timed_out:
+            st.warning(f"{ticker} took too long to load and is left out, try again in a moment")
+        elif ticker not in compare_data:
+            st.warning("Stock is not in the database")
+            st.stop()
+    tickers = [ticker for ticker in tickers if ticker in compare_data]
+
+    tab1, tab2 = st.tabs(["Stock Fundamentals", "Stock Valuation Metrics"])
+    with tab1:
+        col1, col2, col3 = st.columns(3)
+        with col2:
+            st.markdown("")
+            toggle_bar = option_menu(
+                menu_title=None,
+                options=["Annual", "Quarter"],
+                orientation="horizontal",
+                styles={
+                    "container": {"padding": "0!important"},
+                    "nav-link": {
+                        "font-size": "20px",
+                        "margin": "0px",
+                        "text-align": "center",
+                        "--hover-color": "#bbb"},
+                    "nav-link-selected": {"font-weight": "bold"}
+                }
+            )
+
+        finalrevenue = pd.DataFrame()
+        finalrevenuepct = pd.DataFrame()
+        finalnetincome = pd.DataFrame()
+        finalmargins = pd.DataFrame()
+        finalgrossmargins = pd.DataFrame()
+        finalcash = pd.DataFrame()
+        finalcapex = pd.DataFrame()
+        finalfcf = pd.DataFrame()
+        finaldebt = pd.DataFrame()
+        finalebitda = pd.DataFrame()
+        finalebit = pd.DataFrame()
+
+        start = ''
+        end = ''
+        quarter = toggle_bar == 'Quarter'
+        for ticker in tickers:
+            table = get_metrics(ticker)['quarter' if quarter else 'annual']
+
+            if not start and not end:
+                keys = period_keys(table, quarter)
+                columna2, columnb2, columnc2 = st.columns(3)
+                with columna2:
+                    st.markdown(" ")
+                    start, end = st.select_slider("Change date range", options=list(keys),
+                                                  value=(keys[0], keys[-1]),
+                                                  )
+
+            view = select_periods(table, quarter, start, end)
+
+            finalrevenue[ticker] = view['Revenue']
+            finalrevenuepct[ticker] = view['Revenue Growth %']
+            finalnetincome[ticker] = view['Net Income']
+            finalmargins[ticker] = view['Net Margin']
+            finalgrossmargins[ticker] = view['Gross Margin']
+            finalcash[ticker] = view['Cash']
+            finalcapex[ticker] = view['CAPEX']
+            finalfcf[ticker] = view['FCF']
+            finaldebt[ticker] = view['Debt']
+            finalebitda[ticker] = view['EBITDA']
+            finalebit[ticker] = view['EBIT']
+
+
+        col11, col12, col13 = st.columns([1, 1, 1])
+
+        with col11:
+            st.plotly_chart(bar_graph(finalrevenue, 'Revenue'))
+            st.plotly_chart(bar_graph(finalgrossmargins, 'Gross Margins %'))
+            st.plotly_chart(bar_graph(finalcash, 'Cash'))
+            st.plotly_chart(bar_graph(finalebitda, 'EBITDA'))
+
+        with col12:
+            st.plotly_chart(bar_graph(finalnetincome, 'Net Income'))
+            st.plotly_chart(bar_graph(finalmargins, 'Net Margins %'))
+            st.plotly_chart(bar_graph(finaldebt, 'Long Debt'))
+            st.plotly_chart(bar_graph(finalebit, 'EBIT'))
+
+        with col13:
+            st.plotly_chart(bar_graph(finalfcf, 'FCF'))
+            st.plotly_chart(bar_graph(finalrevenuepct, 'Revenue Growth %'))
+            st.plotly_chart(bar_graph(finalcapex, 'CAPEX'))
+
+
+    with tab2:
+        cola1, colb1, colc1 = st.columns(3)
+        with colb1:
+            dropdown = st.selectbox("Select Valuation metric", list(VALUATION_METRICS))
+        with colc1:
+            band_window = st.selectbox("Historical bands", ['Off', *BAND_WINDOWS])
+
+        bands = {}
+
+        for ticker in tickers:
+            if ticker not in compare_prices:
+                st.warning(f"Couldn't load the price history for {ticker}")
+                continue
+            version = (get_metrics(ticker)['quarter'].index[-1], compare_prices[ticker].last_valid_index(),
+                       data_versions.get('fundamentals', ticker))
+            result = get_valuation(ticker, version)[dropdown].dropna()
+
+            final[ticker] = result
+            if band_window != 'Off':
+                bands[ticker] = (result, get_band_store().update(ticker, dropdown, band_window, result))
+
+
+        columna, columnb, columnc = st.columns([0.04, 1.1, 0.14])
+        with columnb:
+            st.markdown("")
+            final = final.reset_index()
+            final['endDate'] = final['endDate'].dt.date
+            start, end = st.select_slider("dummyname3", options=final['endDate'],
+                                          value=(list(final['endDate'])[0], list(final['endDate'])[-1]),
+                                          label_visibility='collapsed')
+
+            final = final[(final.endDate >= start) & (final.endDate <= end)]
+            final = final.set_index('endDate')
+
+        shown = {ticker: stats[(stats.index.date >= start) & (stats.index.date <= end)]
+                 for ticker, (_, stats) in bands.items()}
+        st.plotly_chart(valuation_line_chart(final, bands=shown if bands else None))
+
+        if bands:
+            # Today's value against the window, whatever range the slider shows
+            summary = pd.DataFrame({ticker: band_summary(result, stats) for ticker, (result, stats) in bands.items()}).T
+            st.caption(f"{dropdown} against its own {band_window} history")
+            st.dataframe(summary.style.format('{:,.2f}', na_rep='-'))
@@ -0,0 +1,19 @@
+import pandas as pd
+import streamlit as st
+
+from ..cache import shared_cache
+from ..tracing import tracer
+
+
+def render():
+    # Process-wide counters since start-up; shown with ?debug=1 in the URL
+    with st.sidebar:
+        st.subheader('Debug')
+        summary = pd.DataFrame.from_dict(tracer.summary(), orient='index')
+        if not summary.empty:
+            st.dataframe(summary[['calls', 'hits', 'misses', 'errors', 'mean_ms', 'max_seconds', 'bytes']]
+                         .sort_values('calls', ascending=False))
+        st.write('Shared cache', shared_cache.stats())
+        st.write('Hot keys', pd.DataFrame(tracer.hot_keys(), columns=['stage', 'ticker', 'calls']))
+        st.download_button('Prometheus metrics', tracer.prometheus(shared_cache.stats()), 'stockdoc.prom')
+        st.download_button('Trace events (JSON lines)', tracer.json_lines(), 'stockdoc-trace.jsonl')
@@ -0,0 +1,135 @@
+import streamlit as st
+from streamlit_option_menu import option_menu
+
+from ..charts import bar_graph
+from ..loaders import get_dividends, get_historical_prices, get_metrics, get_stats, run_in_background
+from ..metrics import period_keys, select_periods
+from ..quotes import quote_service
+
+
+def render(ticker, buffer2, buffer32, right_column2, right_column3):
+    with buffer2:
+        toggle_bar = option_menu(
+            menu_title=None,
+            options=["Annual", "Quarter"],
+            orientation="horizontal",
+            styles={
+                "container": {"padding": "0!important"},
+                "nav-link": {
+                    "font-size": "20px",
+                    "margin": "0px",
+                    "text-align": "center",
+                    "--hover-color": "#bbb"},
+                "nav-link-selected": {"font-weight": "bold"}
+            }
+        )
+
+    # The page's inputs are fetched concurrently and each block below renders as
+    # soon as the data it needs has arrived
+    fetches = run_in_background(
+        metrics=(get_metrics, ticker),
+        stats=(get_stats, ticker),
+        prices=(get_historical_prices, ticker),
+        price=(quote_service.get, ticker),
+        dividends=(get_dividends, ticker),
+    )
+
+    with buffer32:
+        try:
+            price_yesterday = fetches['prices'].result()[-2]
+            price = fetches['price'].result()
+        except Exception:
+            price = None
+        else:
+            dif = price - price_yesterday
+            st.metric("placeholder", f'{price.round(2)} USD', delta = f'{dif.round(2)} ({((dif/price_yesterday)*100).round(2)}%)',
+                      label_visibility='collapsed')
+
+    try:
+        metrics = fetches['metrics'].result()
+        stats = fetches['stats'].result()
+    except Exception:
+        st.warning("Stock is not in the database")
+        st.stop()
+
+    latest = metrics['quarter'].iloc[-1]
+    # Without a quote only the ratios that need the price are left out
+    if price is None:
+        with buffer32:
+            st.caption("Couldn't load the stock price")
+
+    with right_column2:
+        st.write(f'Market Cap:  {stats.iloc[0,1]}')
+        st.write(f'PEG Ratio:  {stats.iloc[4,1]}')
+        st.write(f'ROA:  {latest["TTM ROA"].round(2)}%')
+        if price is not None:
+            mkt_cap = price * latest['Shares']
+            st.write(f'Price to FCF:  {(mkt_cap / latest["TTM FCF"]).round(2)}')
+
+    with right_column3:
+        if price is not None:
+            st.write(f'Trailing P/E:  {(mkt_cap / latest["TTM Net Income"]).round(2)}')
+        st.write(f'Forward P/E:  {stats.iloc[3,1]}')
+        st.write(f'ROE:  {latest["TTM ROE"].round(2)}%')
+        if price is not None:
+            st.write(f'Cash flow yield:  {((latest["TTM FCF"] / mkt_cap) * 100).round(2)}%')
+
+    quarter = toggle_bar == 'Quarter'
+    table = metrics['quarter'] if quarter else metrics['annual']
+    keys = period_keys(table, quarter)
+
+    columna, columnb, columnc = st.columns(3)
+    with columna:
+        start, end = st.select_slider("Change date range", options=list(keys), value=(keys[0], keys[-1]))
+
+    view = select_periods(table, quarter, start, end)
+
+    # container.title(f'{price:.2f}')
+
+    revenues = view[['Revenue', 'Net Income']].rename(columns={"Net Income": "Income"})
+    rev_pctchange = view['Revenue Growth %'].rename("Growth %")
+
+    sharesoutstanding = view['Adjusted Shares'].rename('Shares')
+
+    cash_debt = view[['Cash', 'Debt']]
+    capex = view['CAPEX']
+    margins = view[['Gross Margin', 'Net Margin']]
+    fcf = view[['EBITDA', 'EBIT', 'FCF', 'Interest']]
+
+    col11, col12, col13 = st.columns([1, 1, 1])
+
+    with col11:
+        st.plotly_chart(bar_graph(revenues, 'Revenue and Net Income'))
+        st.plotly_chart(bar_graph(rev_pctchange, 'Revenue growth %'))
+        st.plotly_chart(bar_graph(sharesoutstanding, 'Shares Outstanding'))
+
+    with col12:
+        st.plotly_chart(bar_graph(margins, 'Gross and Net Margin %'))
+        st.plotly_chart(bar_graph(fcf, 'EBITDA, EBIT, FCF vs Interest Expense'))
+        dividend_chart = st.empty()
+
+    with col13:
+        st.plotly_chart(bar_graph(cash_debt, 'Cash vs Long Debt'))
+        st.plotly_chart(bar_graph(capex, 'CAPEX'))
+        dividend_ratios = st.container()
+
+    # Dividends are filled in last, into the slots kept for them above
+    try:
+        dividends = fetches['dividends'].result()
+    except Exception:
+        dividends = None
+
+    if dividends is None:
+        dividend_chart.caption("Dividend data is unavailable")
+
+    elif dividends['payments'].empty:
+        dividend_chart.subheader('Company pays no dividends')
+
+    else:
+        dividend_chart.plotly_chart(bar_graph(dividends['quarter' if quarter else 'annual'], 'Dividends per Share'))
+
+        with dividend_ratios:
+            payoutratio = latest['TTM Dividend Payout'] / latest['TTM Net Income']
+            if price is not None:
+                st.write(f'Dividend Yield:  {(dividends["ttm"] / price * 100).round(2)}%')
+            st.write(f'Payout Ratio:  {(payoutratio * 100).round(2)}%')
@@ -0,0 +1,38 @@
+import streamlit as st
+
+from ..loaders import get_current_screener
+from ..screener import SCREEN_COLUMNS
+
+# Columns where a lower value ranks first by default
+LOWER_IS_BETTER = ['Trailing P/E', 'P/FCF', 'Payout Ratio']
+
+
+def render():
+    table = get_current_screener()
+    if len(table) == 0:
+        st.warning("The screener table hasn't been built yet")
+        st.stop()
+
+    cola, colb, colc = st.columns(3)
+    with cola:
+        sort_by = st.selectbox("Rank by", SCREEN_COLUMNS, index=SCREEN_COLUMNS.index('Trailing P/E'))
+    with colb:
+        order = st.radio("Order", ["Lowest first", "Highest first"], horizontal=True,
+                         index=0 if sort_by in LOWER_IS_BETTER else 1)
+    with colc:
+        k = st.number_input("Show top", min_value=1, max_value=1000, value=50, step=10)
+
+    filters = {}
+    filtered = st.multiselect("Filter on", SCREEN_COLUMNS)
+    for column in filtered:
+        low_column, high_column = st.columns(2)
+        with low_column:
+            low = st.number_input(f"{column} min", value=None, placeholder="no minimum")
+        with high_column:
+            high = st.number_input(f"{column} max", value=None, placeholder="no maximum")
+        filters[column] = (low, high)
+
+    result = table.top(sort_by, k=int(k), ascending=order == "Lowest first", filters=filters)
+
+    st.caption(f"{len(result)} of {int(table.mask(filters).sum())} matching tickers, {len(table)} in the universe")
+    st.dataframe(result.style.format('{:,.2f}', na_rep='-'), use_container_width=True)
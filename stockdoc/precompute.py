@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import shutil
+import argparse
+from multiprocessing import Pool
+import pandas as pd
+
+from . import ROOT_DIR
+from .dividends import build_dividends, fetch_dividends
+from .metrics import build_metrics
+from .screener import ScreenerTable, screen_row
+from .snapshots import connect_firebase, firebase_key, load_fundamentals, sync_ticker, update_prices
+from .valuation import build_valuation
+
+# Offline pipeline: fundamentals -> derived metrics and split-adjusted shares ->
+# valuation multiples for every ticker, written to artifacts/<version>/<ticker>/.
+# A build only becomes visible to the app once it is complete and CURRENT is
+# switched to it; the app reads artifacts and never writes them. Each version
+# also has screener.parquet, the universe-wide screener table, carried over
+# from the previous version with only the rebuilt tickers' rows replaced.
+ARTIFACT_DIR = os.environ.get('STOCKDOC_ARTIFACT_DIR', os.path.join(ROOT_DIR, 'artifacts'))
+KEEP_VERSIONS = 3
+
+
+def current_version():
+    try:
+        with open(os.path.join(ARTIFACT_DIR, 'CURRENT')) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def artifact_path(version, ticker, name):
+    return os.path.join(ARTIFACT_DIR, version, ticker, f'{name}.parquet')
+
+
+def read_artifact(ticker, names=('annual', 'quarter')):
+    version = current_version()
+    if version is None:
+        return None
+
+    paths = {name: artifact_path(version, ticker, name) for name in names}
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+
+    return {name: pd.read_parquet(path) for name, path in paths.items()}
+
+
+def load_metrics(ticker, version, fundamentals):
+    # The app's and the service's metrics tables: the published artifact while
+    # the ticker's data version is 0 (artifacts predate any change the listener
+    # has seen for it), otherwise built from fundamentals(ticker)
+    artifact = read_artifact(ticker) if version == 0 else None
+    if artifact is not None:
+        return {'annual': artifact['annual'], 'quarter': artifact['quarter']}
+
+    return build_metrics(*fundamentals(ticker))
+
+
+def load_valuation(ticker, version, prices, quarter_metrics):
+    # Likewise for valuation, where the artifact must also reach the last price
+    # date; quarter_metrics() is only called when rebuilding
+    if version == 0:
+        artifact = read_artifact(ticker, ['valuation'])
+        if artifact is not None and artifact['valuation'].index[-1] >= prices.last_valid_index():
+            return artifact['valuation']
+
+    return build_valuation(quarter_metrics(), prices)
+
+
+def screener_path(version):
+    return os.path.join(ARTIFACT_DIR, version, 'screener.parquet')
+
+
+def read_screener(version=None):
+    version = version or current_version()
+    if version is None or not os.path.exists(screener_path(version)):
+        return ScreenerTable()
+
+    return ScreenerTable.from_frame(pd.read_parquet(screener_path(version)))
+
+
+db = None
+
+
+def init_worker(key_json):
+    global db
+    db = connect_firebase(key_json)
+
+
+def build_ticker(version, ticker):
+    try:
+        # Bring the snapshot up to date first; load_fundamentals alone would
+        # keep rebuilding from whatever snapshot the first run wrote
+        sync_ticker(db, ticker)
+        dfannual, dfquarter = load_fundamentals(db, ticker)
+        metrics = build_metrics(dfannual, dfquarter)
+        prices = update_prices(ticker)
+        frames = {**metrics, 'valuation': build_valuation(metrics['quarter'], prices)}
+
+        for name, df in frames.items():
+            path = artifact_path(version, ticker, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            df.to_parquet(path)
+
+        try:
+            dividends = build_dividends(fetch_dividends(db, ticker))
+        except Exception:
+            dividends = None
+        row = screen_row(metrics['quarter'], prices.dropna().iloc[-1], dividends)
+    except Exception as e:
+        shutil.rmtree(os.path.join(ARTIFACT_DIR, version, ticker), ignore_errors=True)
+        return ticker, f'{type(e).__name__}: {e}', None
+
+    return ticker, None, row
+
+
+def link_or_copy(src, dst):
+    # Artifacts are never written after a build, so an unchanged ticker's files
+    # can be shared between versions as hard links instead of copies
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def publish(version):
+    tmp_path = os.path.join(ARTIFACT_DIR, 'CURRENT.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(ARTIFACT_DIR, 'CURRENT'))
+
+    versions = sorted(name for name in os.listdir(ARTIFACT_DIR)
+                      if os.path.isdir(os.path.join(ARTIFACT_DIR, name)))
+    for old in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(ARTIFACT_DIR, old), ignore_errors=True)
+
+
+def precompute(key_json, tickers=None, workers=None):
+    if not tickers:
+        reading = connect_firebase(key_json).child('allnames').child('list').get().val()
+        tickers = list(reading['names'])
+
+    version = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+    os.makedirs(os.path.join(ARTIFACT_DIR, version), exist_ok=True)
+
+    previous = current_version()
+    screener = read_screener(previous)
+
+    built = []
+    failed = {}
+    with Pool(workers, initializer=init_worker, initargs=(key_json,)) as pool:
+        for ticker, error, row in pool.starmap(build_ticker, [(version, ticker) for ticker in tickers],
+                                               chunksize=4):
+            if error is None:
+                built.append(ticker)
+                screener.update(ticker, row)
+            else:
+                failed[ticker] = error
+                print(f'{ticker}: {error}')
+
+    # Tickers left out of this build, or that failed, keep their previous artifacts
+    if previous is not None:
+        previous_dir = os.path.join(ARTIFACT_DIR, previous)
+        for ticker in os.listdir(previous_dir):
+            target = os.path.join(ARTIFACT_DIR, version, ticker)
+            if os.path.isdir(os.path.join(previous_dir, ticker)) and not os.path.exists(target):
+                shutil.copytree(os.path.join(previous_dir, ticker), target, copy_function=link_or_copy)
+
+    screener.to_frame().to_parquet(screener_path(version))
+
+    with open(os.path.join(ARTIFACT_DIR, version, 'manifest.json'), 'w') as f:
+        json.dump({'version': version, 'tickers': built, 'failed': failed}, f, indent=2)
+
+    publish(version)
+    print(f'{version}: built {len(built)} tickers, {len(failed)} failed')
+
+    return version
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Precompute metrics and valuation series for the app')
+    parser.add_argument('tickers', nargs='*', help='tickers to build (default: the whole allnames list)')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    precompute(firebase_key(), args.tickers, workers=args.workers)
@@ -0,0 +1,87 @@
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+import numpy as np
+
+# Live quotes shared by every session in the process. A quote is reused for
+# QUOTE_TTL seconds, and concurrent requests for a ticker that is already being
+# fetched wait on that fetch instead of starting their own. Callers give up
+# after QUOTE_TIMEOUT seconds (yahoo_fin sets no timeout of its own), and the
+# next request for the ticker starts a new fetch.
+QUOTE_TTL = 15
+QUOTE_TIMEOUT = 10
+
+
+def fetch_live_price(ticker):
+    import yahoo_fin.stock_info as si
+
+    return si.get_live_price(ticker.replace('_', '-'))
+
+
+class QuoteService:
+    def __init__(self, fetch_one=fetch_live_price, ttl=QUOTE_TTL, timeout=QUOTE_TIMEOUT, max_workers=8):
+        self.fetch_one = fetch_one
+        self.ttl = ttl
+        self.timeout = timeout
+        self.quotes = {}
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max_workers)
+        self.upstream_requests = 0
+
+    def _fresh(self, ticker):
+        quote = self.quotes.get(ticker)
+        if quote is not None and time.monotonic() - quote[0] < self.ttl:
+            return quote[1]
+        return None
+
+    def _claim(self, ticker):
+        # Returns the future to wait on and whether this caller has to fetch
+        with self.lock:
+            future = self.inflight.get(ticker)
+            if future is not None:
+                return future, False
+            future = self.inflight[ticker] = Future()
+            self.upstream_requests += 1
+
+        return future, True
+
+    def _resolve(self, ticker, future, price=None, error=None):
+        # Called by the fetch and by a caller that timed out, whichever is first;
+        # a late price is still kept for the next request
+        with self.lock:
+            if error is None:
+                self.quotes[ticker] = (time.monotonic(), price)
+            if self.inflight.get(ticker) is future:
+                del self.inflight[ticker]
+            if future.done():
+                return
+            if error is None:
+                future.set_result(price)
+            else:
+                future.set_exception(error)
+
+    def _fetch_one(self, ticker, future):
+        try:
+            price = np.float64(self.fetch_one(ticker))
+        except Exception as e:
+            self._resolve(ticker, future, error=e)
+        else:
+            self._resolve(ticker, future, price)
+
+    def get(self, ticker):
+        price = self._fresh(ticker)
+        if price is not None:
+            return price
+
+        future, owned = self._claim(ticker)
+        if owned:
+            self.pool.submit(self._fetch_one, ticker, future)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._resolve(ticker, future, error=TimeoutError(f'no quote for {ticker} after {self.timeout}s'))
+            raise
+
+
+quote_service = QuoteService()
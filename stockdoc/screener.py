@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+# Universe-wide table of the latest TTM ratios, one row per ticker, kept as one
+# contiguous float64 array per column so filtered top-k runs as numpy operations
+# over every ticker at once. precompute replaces the rows of the tickers it
+# rebuilds; the table is never recomputed as a whole. The app only reads the
+# published table, so a ticker the app rebuilds between precompute runs keeps
+# its row from the last run.
+
+SCREEN_COLUMNS = ['Price', 'Market Cap', 'Trailing P/E', 'P/FCF', 'ROA', 'ROE', 'Cash Flow Yield',
+                  'Dividend Yield', 'Payout Ratio', 'Revenue Growth %']
+
+
+def screen_row(quarter, price, dividends=None):
+    # Same quantities as the single-stock header, from the latest quarter
+    latest = quarter.iloc[-1]
+    mkt_cap = price * latest['Shares']
+    ttm_dividends = np.nan if dividends is None or dividends['payments'].empty else dividends['ttm']
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = {
+            'Price': price,
+            'Market Cap': mkt_cap,
+            'Trailing P/E': mkt_cap / latest['TTM Net Income'],
+            'P/FCF': mkt_cap / latest['TTM FCF'],
+            'ROA': latest['TTM ROA'],
+            'ROE': latest['TTM ROE'],
+            'Cash Flow Yield': (latest['TTM FCF'] / mkt_cap) * 100,
+            'Dividend Yield': (ttm_dividends / price) * 100,
+            'Payout Ratio': (latest['TTM Dividend Payout'] / latest['TTM Net Income']) * 100,
+            'Revenue Growth %': quarter['TTM Revenue'].pct_change(4).iloc[-1] * 100,
+        }
+
+    return {column: float(value) if np.isfinite(value) else np.nan for column, value in values.items()}
+
+
+class ScreenerTable:
+    def __init__(self, columns=SCREEN_COLUMNS, capacity=1024):
+        self.columns = list(columns)
+        self.column_index = {column: i for i, column in enumerate(self.columns)}
+        self.values = np.full((len(self.columns), capacity), np.nan)
+        self.tickers = []
+        self.positions = {}
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self.positions
+
+    def column(self, name):
+        return self.values[self.column_index[name], :len(self.tickers)]
+
+    def update(self, ticker, row):
+        position = self.positions.get(ticker)
+        if position is None:
+            position = len(self.tickers)
+            if position == self.values.shape[1]:
+                grown = np.full((len(self.columns), 2 * position), np.nan)
+                grown[:, :position] = self.values
+                self.values = grown
+            self.tickers.append(ticker)
+            self.positions[ticker] = position
+        self.values[:, position] = [row.get(column, np.nan) for column in self.columns]
+
+    def mask(self, filters=None):
+        # filters: {column: (low, high)} with None for an open end. Rows with
+        # NaN in a filtered column never match.
+        matched = np.ones(len(self.tickers), dtype=bool)
+        for column, (low, high) in (filters or {}).items():
+            values = self.column(column)
+            if low is not None:
+                matched &= values >= low
+            if high is not None:
+                matched &= values <= high
+            if low is None and high is None:
+                matched &= ~np.isnan(values)
+
+        return matched
+
+    def frame(self, positions=None):
+        if positions is None:
+            positions = np.arange(len(self.tickers))
+        tickers = np.array(self.tickers, dtype=object)[positions]
+
+        return pd.DataFrame(self.values[:, positions].T, index=pd.Index(tickers, name='ticker'), columns=self.columns)
+
+    def top(self, column, k=20, ascending=False, filters=None):
+        positions = np.flatnonzero(self.mask(filters))
+        values = self.column(column)[positions]
+        positions, values = positions[~np.isnan(values)], values[~np.isnan(values)]
+        keys = values if ascending else -values
+
+        if k < len(positions):
+            best = np.argpartition(keys, k)[:k]
+            positions, keys = positions[best], keys[best]
+
+        return self.frame(positions[np.argsort(keys, kind='stable')])
+
+    def to_frame(self):
+        return self.frame()
+
+    @classmethod
+    def from_frame(cls, df, columns=SCREEN_COLUMNS):
+        table = cls(columns, capacity=max(len(df), 1024))
+        table.tickers = [str(ticker) for ticker in df.index]
+        table.positions = {ticker: i for i, ticker in enumerate(table.tickers)}
+        table.values[:, :len(df)] = df.reindex(columns=table.columns).to_numpy(dtype='float64').T
+
+        return table
@@ -0,0 +1,49 @@
+import difflib
+from bisect import bisect_left
+import numpy as np
+
+# Sorted lookup over the ticker universe for the stock pickers. Built once per
+# ticker list; queries return at most k matches so the widgets never have to
+# carry the whole universe.
+
+
+class TickerIndex:
+    def __init__(self, tickers, names=None):
+        names = names or {}
+        universe = {ticker for ticker in tickers if ticker}
+        self.tickers = sorted(universe, key=str.upper)
+        self.keys = [ticker.upper() for ticker in self.tickers]
+        self.upper = np.array(self.keys)
+
+        # company name -> ticker, sorted on the upper-cased name
+        named = sorted((name.upper(), ticker) for ticker, name in names.items() if name and ticker in universe)
+        self.name_keys = [name for name, _ in named]
+        self.name_tickers = [ticker for _, ticker in named]
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def _prefix(self, keys, values, query, k):
+        start = bisect_left(keys, query)
+        end = bisect_left(keys, query + '\uffff', lo=start)
+
+        return values[start:min(end, start + k)]
+
+    def search(self, query, k=20):
+        query = query.strip().upper()
+        if not query:
+            return self.tickers[:k]
+
+        matches = list(self._prefix(self.keys, self.tickers, query, k))
+        if len(matches) < k and self.name_keys:
+            matches += self._prefix(self.name_keys, self.name_tickers, query, k)
+
+        if len(matches) < k:
+            contains = np.flatnonzero(np.char.find(self.upper, query) >= 0)
+            matches += [self.tickers[i] for i in contains[:k]]
+
+        if len(matches) < k:
+            close = difflib.get_close_matches(query, self.keys, n=k, cutoff=0.6)
+            matches += [self.tickers[bisect_left(self.keys, key)] for key in close]
+
+        return list(dict.fromkeys(matches))[:k]
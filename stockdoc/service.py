@@ -0,0 +1,310 @@
+import json
+import time
+import argparse
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+
+from .cache import LOCAL_TTL, freeze, shared_cache
+from .invalidation import LIVE_UPDATES, ChangeListener, data_versions
+from .metrics import METRIC_COLUMNS
+from .precompute import load_metrics, load_valuation
+from .snapshots import ConnectionPool, connect_firebase, firebase_key, load_fundamentals, update_prices
+from .tracing import tracer
+from .valuation import VALUATION_METRICS
+
+# Headless batch service over the same loaders and builders as the app, for
+# consumers that want the metric and valuation series without the UI:
+#
+#   python -m stockdoc.service [--host 127.0.0.1] [--port 8600] [--workers 8]
+#
+#   POST /metrics    {"tickers": [...], "metrics": [...], "period": "quarter", "start": ..., "end": ...}
+#   POST /valuation  {"tickers": [...], "metrics": [...], "start": ..., "end": ...}
+#   GET  /health
+#
+# The same parameters work as a GET query string (comma-separated lists).
+# Tickers are computed concurrently and streamed as they finish, one JSON line
+# per ticker, or as an Arrow IPC stream of (ticker, date, metric, value) rows
+# with format=arrow (a failed ticker is a row with only ticker and error set).
+# Remote data goes through the shared cache under the app's keys, so the
+# service and the app warm each other's entries, and precomputed artifacts are
+# used where they are current.
+#
+# Derived tables are kept in process per ticker and data version, so
+# concurrent and repeated requests for a ticker build them once.
+#
+# Credentials: see snapshots.firebase_key().
+DEFAULT_PORT = 8600
+MAX_TICKERS = 500
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+# Same lifetimes as the app's metrics and valuation loaders
+METRICS_TTL = None if LIVE_UPDATES else LOCAL_TTL
+VALUATION_TTL = LOCAL_TTL
+
+
+class TableCache:
+    # Bounded LRU of built tables with a TTL per entry. Concurrent misses on a
+    # key wait for the one build instead of each running it.
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.inflight = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, build, ttl=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self.entries.move_to_end(key)
+                return entry[1]
+            future = self.inflight.get(key)
+            owned = future is None
+            if owned:
+                future = self.inflight[key] = Future()
+
+        if not owned:
+            return future.result()
+
+        try:
+            value = freeze(build())
+        except Exception as e:
+            with self.lock:
+                del self.inflight[key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            self.entries[key] = (None if ttl is None else time.monotonic() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            del self.inflight[key]
+        future.set_result(value)
+
+        return value
+
+
+class BatchService:
+    def __init__(self, key_json, workers=8):
+        self.pool = ConnectionPool(key_json, workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='stockdoc-service')
+        self.tables = TableCache()
+        self.listener = None
+
+        @tracer.computed('fundamentals')
+        @shared_cache.cached('fundamentals')
+        def fundamentals(ticker):
+            with self.pool.connection() as db:
+                return load_fundamentals(db, ticker)
+
+        @tracer.computed('prices')
+        @shared_cache.cached('prices')
+        def prices(ticker):
+            return update_prices(ticker)
+
+        self.fundamentals = tracer.traced('fundamentals')(fundamentals)
+        self.prices = tracer.traced('prices')(prices)
+        self.table = tracer.traced('service')(self.table)
+
+    def start_listener(self):
+        # Connections of its own: the stream threads resync tickers on them
+        # while the workers use the pooled ones
+        self.listener = ChangeListener(functools.partial(connect_firebase, self.pool.key_json)).start()
+
+    def metrics(self, ticker):
+        version = data_versions.get('fundamentals', ticker)
+
+        return self.tables.get(('metrics', ticker, version),
+                               lambda: load_metrics(ticker, version, self.fundamentals), METRICS_TTL)
+
+    def valuation(self, ticker):
+        # Keyed on the last price date too, as the app's get_valuation is
+        prices = self.prices(ticker)
+        version = data_versions.get('fundamentals', ticker)
+        key = ('valuation', ticker, version, prices.last_valid_index())
+
+        return self.tables.get(key, lambda: load_valuation(ticker, version, prices,
+                                                           lambda: self.metrics(ticker)['quarter']), VALUATION_TTL)
+
+    def table(self, ticker, kind, params):
+        if kind == 'metrics':
+            table = self.metrics(ticker)[params['period']]
+        else:
+            table = self.valuation(ticker)
+        table = table[params['metrics']] if params['metrics'] else table
+
+        return table.loc[params['start']:params['end']]
+
+    def run(self, kind, params):
+        # (ticker, table or None, error or None) in the order the tickers finish
+        futures = {self.executor.submit(self.table, ticker, kind, params): ticker
+                   for ticker in params['tickers']}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, f'{type(e).__name__}: {e}'
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_params(kind, values):
+    def listed(name):
+        value = values.get(name) or []
+        return [item for item in (value.split(',') if isinstance(value, str) else value) if item]
+
+    params = {'tickers': list(dict.fromkeys(ticker.upper() for ticker in listed('tickers'))),
+              'metrics': listed('metrics'),
+              'period': values.get('period') or 'quarter',
+              'start': values.get('start') or None,
+              'end': values.get('end') or None,
+              'format': values.get('format') or 'json'}
+
+    if not params['tickers']:
+        raise ValueError('tickers is required')
+    if len(params['tickers']) > MAX_TICKERS:
+        raise ValueError(f'at most {MAX_TICKERS} tickers per request')
+    if params['period'] not in ('quarter', 'annual'):
+        raise ValueError("period must be 'quarter' or 'annual'")
+    if params['format'] not in ('json', 'arrow'):
+        raise ValueError("format must be 'json' or 'arrow'")
+    known = VALUATION_METRICS if kind == 'valuation' else METRIC_COLUMNS
+    unknown = [metric for metric in params['metrics'] if metric not in known]
+    if unknown:
+        raise ValueError(f'unknown {"valuation " if kind == "valuation" else ""}metrics: {", ".join(unknown)}')
+    for name in ('start', 'end'):
+        if params[name] is not None:
+            params[name] = pd.Timestamp(params[name])
+
+    return params
+
+
+def json_line(ticker, table, error):
+    if error is not None:
+        return {'ticker': ticker, 'error': error}
+    # Columnar per ticker; NaN and inf go out as null
+    values = table.to_numpy(dtype='float64')
+    values = np.where(np.isfinite(values), values, None)
+
+    return {'ticker': ticker, 'dates': list(table.index.strftime('%Y-%m-%d')),
+            'series': {str(column): values[:, i].tolist() for i, column in enumerate(table.columns)}}
+
+
+def arrow_batch(ticker, table, schema):
+    import pyarrow as pa
+
+    # Long format so every ticker fits the one stream schema, whatever its columns
+    long = table.rename_axis('date').reset_index().melt('date', var_name='metric')
+    long['value'] = long['value'].astype('float64')
+
+    return pa.RecordBatch.from_arrays([pa.array([ticker] * len(long), pa.string()),
+                                       pa.array(long['date'], schema.field('date').type),
+                                       pa.array(long['metric'].astype(str), pa.string()),
+                                       pa.array(long['value'], pa.float64()),
+                                       pa.nulls(len(long), pa.string())], schema=schema)
+
+
+def arrow_error(ticker, error, schema):
+    import pyarrow as pa
+
+    return pa.RecordBatch.from_pylist([{'ticker': ticker, 'error': error}], schema=schema)
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = 'stockdoc'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/health':
+            return self.send_json(200, {'status': 'ok', 'cache': shared_cache.stats(), 'stages': tracer.summary()})
+        self.dispatch(url.path, {name: values[-1] for name, values in parse_qs(url.query).items()})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            return self.send_json(400, {'error': 'body must be a JSON object'})
+        self.dispatch(urlparse(self.path).path, body if isinstance(body, dict) else {})
+
+    def dispatch(self, path, values):
+        kind = path.strip('/')
+        if kind not in ('metrics', 'valuation'):
+            return self.send_json(404, {'error': f'no endpoint {path}'})
+        try:
+            params = parse_params(kind, values)
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+
+        results = self.server.service.run(kind, params)
+        if params['format'] == 'arrow':
+            self.stream_arrow(results)
+        else:
+            self.stream_json(results)
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    # Streams have no Content-Length: the response ends when the connection closes
+    def stream_json(self, results):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.end_headers()
+        for result in results:
+            self.wfile.write(json.dumps(json_line(*result)).encode() + b'\n')
+            self.wfile.flush()
+
+    def stream_arrow(self, results):
+        import pyarrow as pa
+
+        schema = pa.schema([('ticker', pa.string()), ('date', pa.timestamp('ns')), ('metric', pa.string()),
+                            ('value', pa.float64()), ('error', pa.string())])
+        self.send_response(200)
+        self.send_header('Content-Type', ARROW_TYPE)
+        self.end_headers()
+        with pa.ipc.new_stream(self.wfile, schema) as writer:
+            for ticker, table, error in results:
+                if error is None:
+                    writer.write_batch(arrow_batch(ticker, table, schema))
+                else:
+                    writer.write_batch(arrow_error(ticker, error, schema))
+                self.wfile.flush()
+
+
+def serve(key_json, host='127.0.0.1', port=DEFAULT_PORT, workers=8):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.service = BatchService(key_json, workers)
+    if LIVE_UPDATES:
+        server.service.start_listener()
+
+    print(f'serving on http://{host}:{server.server_address[1]}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve metric and valuation series over HTTP')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=8, help='tickers computed at once, and Firebase connections')
+    args = parser.parse_args()
+
+    serve(firebase_key(), args.host, args.port, args.workers)
@@ -0,0 +1,333 @@
+import os
+import sys
+import json
+import time
+import queue
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+from . import ROOT_DIR
+
+# Local columnar copy of the Firebase 'year' and 'quarter' nodes, one parquet
+# file per ticker and period. load_fundamentals reads from here first, fetches
+# a ticker that has no snapshot yet, and checks Firebase for new rows once a
+# snapshot is older than SNAPSHOT_TTL seconds (its mtime is when it was last
+# written or found current). That is kept well under the shared cache's TTL, so
+# a shared-cache refresh does check Firebase rather than re-serve the snapshot. Daily adjclose histories live alongside under
+# 'prices' and are extended with only the bars since the last stored date.
+SNAPSHOT_DIR = os.environ.get('STOCKDOC_SNAPSHOT_DIR', os.path.join(ROOT_DIR, 'snapshots'))
+SNAPSHOT_TTL = int(os.environ.get('STOCKDOC_SNAPSHOT_TTL', 3600))
+PERIODS = ['year', 'quarter']
+# Fundamentals schema: endDate is datetime64, every numeric field is stored as
+# AMOUNT_DTYPE and every other field is categorical. STOCKDOC_FLOAT32=1 stores
+# amounts as float32, which halves the frames; derived metrics are still
+# computed in float64.
+AMOUNT_DTYPE = 'float32' if os.environ.get('STOCKDOC_FLOAT32', '') not in ('', '0') else 'float64'
+
+
+def snapshot_path(period, ticker):
+    return os.path.join(SNAPSHOT_DIR, period, f'{ticker}.parquet')
+
+
+def firebase_records(node):
+    # pyrebase returns a list for dense array nodes and an OrderedDict keyed by
+    # the array index for sparse or ranged (start_at) queries
+    if node is None:
+        return []
+    if isinstance(node, dict):
+        return [node[key] for key in sorted(node, key=int) if node[key] is not None]
+    return [record for record in node if record is not None]
+
+
+def apply_schema(df):
+    columns = {}
+    for column in df.columns:
+        values = df[column]
+        if column == 'endDate':
+            dates = pd.to_datetime(values)
+            columns[column] = dates.dt.tz_localize(None) if dates.dt.tz is not None else dates
+        elif pd.api.types.is_numeric_dtype(values):
+            columns[column] = values.fillna(0).astype(AMOUNT_DTYPE)
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            columns[column] = values
+        else:
+            values = values.replace('None', pd.NA)
+            numbers = pd.to_numeric(values, errors='coerce')
+            if numbers.notna().sum() == values.notna().sum():
+                columns[column] = numbers.fillna(0).astype(AMOUNT_DTYPE)
+            else:
+                columns[column] = values.fillna(0).astype(str).astype('category')
+
+    return pd.DataFrame(columns, index=df.index)
+
+
+def records_to_frame(records):
+    df = apply_schema(pd.DataFrame.from_records(records))
+
+    return df.sort_values('endDate').reset_index(drop=True)
+
+
+def frame_bytes(value):
+    # Deep in-memory size of a frame, series or a dict/list of them
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True, index=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, dict):
+        return sum(frame_bytes(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(frame_bytes(item) for item in value)
+
+    return 0
+
+
+def read_snapshot(period, ticker):
+    path = snapshot_path(period, ticker)
+    if not os.path.exists(path):
+        return None
+
+    # Snapshots written before the schema existed hold object columns
+    return apply_schema(pd.read_parquet(path))
+
+
+def write_snapshot(period, ticker, df):
+    path = snapshot_path(period, ticker)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def touch_snapshot(period, ticker):
+    # Marks the snapshot as checked against Firebase just now
+    try:
+        os.utime(snapshot_path(period, ticker))
+    except OSError:
+        pass
+
+
+def fetch_period(db, period, ticker):
+    records = firebase_records(db.child(period).child(ticker).get().val())
+    if not records:
+        return None
+
+    return records_to_frame(records)
+
+
+def is_stale(period, ticker, max_age=SNAPSHOT_TTL):
+    try:
+        return time.time() - os.path.getmtime(snapshot_path(period, ticker)) > max_age
+    except OSError:
+        return False
+
+
+def load_fundamentals(db, ticker):
+    if any(is_stale(period, ticker) for period in PERIODS):
+        try:
+            sync_ticker(db, ticker)
+        except Exception:
+            # Firebase unreachable: the snapshot we have beats no data
+            pass
+
+    frames = []
+    for period in PERIODS:
+        df = read_snapshot(period, ticker)
+        if df is None:
+            df = fetch_period(db, period, ticker)
+            if df is None:
+                raise KeyError(ticker)
+            try:
+                write_snapshot(period, ticker, df)
+            except OSError:
+                pass
+        frames.append(df)
+
+    return frames
+
+
+def sync_ticker(db, ticker, full=False):
+    updated = []
+    for period in PERIODS:
+        stored = None if full else read_snapshot(period, ticker)
+
+        if stored is None:
+            df = fetch_period(db, period, ticker)
+        else:
+            # The ingest job only ever appends to these arrays, so the number of
+            # rows we already hold is the first Firebase key we haven't seen.
+            keys = db.child(period).child(ticker).shallow().get().val() or []
+            if len(keys) <= len(stored):
+                touch_snapshot(period, ticker)
+                continue
+            node = db.child(period).child(ticker).order_by_key().start_at(str(len(stored))).get().val()
+            records = firebase_records(node)
+            if not records:
+                touch_snapshot(period, ticker)
+                continue
+            df = pd.concat([stored, records_to_frame(records)], ignore_index=True)
+            df = apply_schema(df.drop_duplicates('endDate', keep='last')).sort_values('endDate').reset_index(drop=True)
+
+        if df is not None:
+            write_snapshot(period, ticker, df)
+            updated.append(period)
+
+    return updated
+
+
+def read_prices(ticker):
+    path = snapshot_path('prices', ticker)
+    if not os.path.exists(path):
+        return None
+
+    return pd.read_parquet(path).set_index('date')['adjclose']
+
+
+def write_prices(ticker, prices):
+    write_snapshot('prices', ticker, prices.rename('adjclose').rename_axis('date').reset_index())
+
+
+def fetch_prices(ticker, start_date=None):
+    import yahoo_fin.stock_info as si
+
+    return si.get_data(ticker.replace('_', '-'), start_date=start_date)['adjclose']
+
+
+def update_prices(ticker):
+    stored = read_prices(ticker)
+    if stored is None or stored.empty:
+        prices = fetch_prices(ticker)
+    else:
+        # Re-fetch from the last stored bar so the overlap shows whether Yahoo
+        # has since re-based adjclose for a dividend or split, and if so scale
+        # the stored history by the same factor.
+        last_date = stored.index[-1]
+        try:
+            recent = fetch_prices(ticker, start_date=last_date).dropna()
+        except Exception:
+            return stored
+        if recent.empty:
+            return stored
+
+        if last_date in recent.index and not np.isclose(recent[last_date], stored.iloc[-1]):
+            stored = stored * (recent[last_date] / stored.iloc[-1])
+        prices = pd.concat([stored[stored.index < recent.index[0]], recent])
+
+    prices = prices.rename('adjclose')
+    try:
+        write_prices(ticker, prices)
+    except OSError:
+        pass
+
+    return prices
+
+
+def footprint_report(tickers):
+    # In-memory size of each ticker's cached fundamentals, as loaded from the
+    # snapshot store
+    rows = []
+    for ticker in tickers:
+        frames = {period: read_snapshot(period, ticker) for period in PERIODS}
+        if any(df is None for df in frames.values()):
+            continue
+        rows.append({'ticker': ticker,
+                     **{f'{period} rows': len(df) for period, df in frames.items()},
+                     **{f'{period} KiB': frame_bytes(df) / 1024 for period, df in frames.items()},
+                     'total KiB': frame_bytes(list(frames.values())) / 1024})
+
+    return pd.DataFrame(rows).set_index('ticker') if rows else pd.DataFrame()
+
+
+def refresh_prices(tickers):
+    for ticker in tickers:
+        try:
+            prices = update_prices(ticker)
+        except Exception as e:
+            print(f'{ticker}: prices failed ({e})')
+            continue
+        print(f'{ticker}: prices to {prices.index[-1].date()}')
+
+
+def firebase_key():
+    # Credentials for the command-line tools: STOCKDOC_FIREBASE_KEY, or the
+    # app's .streamlit/secrets.toml
+    key_json = os.environ.get('STOCKDOC_FIREBASE_KEY')
+    if key_json is None:
+        import streamlit as st
+        key_json = st.secrets["textkey"]
+
+    return key_json
+
+
+def connect_firebase(key_json):
+    import pyrebase
+
+    firebase = pyrebase.initialize_app(json.loads(key_json))
+
+    return firebase.database()
+
+
+class ConnectionPool:
+    # pyrebase builds each query's path on the Database object itself (child()
+    # appends, get() resets), so threads must not share one: each caller checks
+    # out a connection of its own, and waits for one once size are in use
+    def __init__(self, key_json, size):
+        self.key_json = key_json
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        try:
+            db = self.idle.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                grow = self.created < self.size
+                if grow:
+                    self.created += 1
+            db = connect_firebase(self.key_json) if grow else self.idle.get()
+        try:
+            yield db
+        finally:
+            self.idle.put(db)
+
+
+def sync(db, tickers=None, full=False, prices=False):
+    if not tickers:
+        tickers = list(db.child('allnames').child('list').get().val()['names'])
+
+    if prices:
+        refresh_prices(tickers)
+
+    for ticker in tickers:
+        try:
+            updated = sync_ticker(db, ticker, full=full)
+        except Exception as e:
+            print(f'{ticker}: failed ({e})')
+            continue
+        if updated:
+            print(f'{ticker}: updated {", ".join(updated)}')
+
+
+if __name__ == '__main__':
+    # python -m stockdoc.snapshots [--full] [--prices] [TICKER ...]
+    # python -m stockdoc.snapshots --report [TICKER ...]   (memory footprint, no sync)
+    # Credentials: see firebase_key()
+    args = sys.argv[1:]
+    full = '--full' in args
+    prices = '--prices' in args
+    tickers = [arg for arg in args if not arg.startswith('--')]
+
+    if '--report' in args:
+        if not tickers and os.path.isdir(os.path.join(SNAPSHOT_DIR, 'quarter')):
+            tickers = sorted(name[:-len('.parquet')] for name in os.listdir(os.path.join(SNAPSHOT_DIR, 'quarter'))
+                             if name.endswith('.parquet'))
+        report = footprint_report(tickers)
+        print(report.round(1).to_string() if not report.empty else 'no snapshots')
+        if not report.empty:
+            print(f'{AMOUNT_DTYPE} amounts, {report["total KiB"].sum() / 1024:.1f} MiB over {len(report)} tickers')
+        sys.exit(0)
+
+    sync(connect_firebase(firebase_key()), tickers, full=full, prices=prices)
@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import threading
+import functools
+from collections import Counter, defaultdict, deque
+
+from .snapshots import frame_bytes
+
+# Per-process timings for the app's loaders and builders. traced() goes outside
+# a cache decorator and times every call; computed() goes inside it and only
+# runs on a cache miss, so hits are calls minus misses. Payload sizes are taken
+# on misses, when the value is new. Counters are always on; every event is also
+# appended as a JSON line to STOCKDOC_TRACE_FILE when that is set.
+TRACE_FILE = os.environ.get('STOCKDOC_TRACE_FILE')
+RECENT_EVENTS = 1000
+
+
+class Tracer:
+    def __init__(self, path=TRACE_FILE, recent=RECENT_EVENTS):
+        self.path = path
+        self.lock = threading.Lock()
+        self.stages = defaultdict(lambda: {'calls': 0, 'misses': 0, 'errors': 0, 'seconds': 0.0,
+                                           'max_seconds': 0.0, 'miss_seconds': 0.0, 'bytes': 0})
+        self.tickers = Counter()
+        self.events = deque(maxlen=recent)
+
+    def record(self, stage, event, seconds, key=None, size=None, error=None):
+        entry = {'ts': time.time(), 'stage': stage, 'event': event, 'seconds': round(seconds, 6)}
+        if key is not None:
+            entry['key'] = key
+        if size is not None:
+            entry['bytes'] = size
+        if error is not None:
+            entry['error'] = error
+
+        with self.lock:
+            stats = self.stages[stage]
+            if event == 'call':
+                stats['calls'] += 1
+                stats['seconds'] += seconds
+                stats['max_seconds'] = max(stats['max_seconds'], seconds)
+                if key is not None:
+                    self.tickers[stage, key] += 1
+                if error is not None:
+                    stats['errors'] += 1
+            elif event == 'miss':
+                stats['misses'] += 1
+                stats['miss_seconds'] += seconds
+                stats['bytes'] += size or 0
+            self.events.append(entry)
+
+        if self.path:
+            try:
+                with open(self.path, 'a') as f:
+                    f.write(json.dumps(entry, default=str) + '\n')
+            except OSError:
+                pass
+
+    def _wrap(self, stage, event, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = str(args[0]) if args and isinstance(args[0], str) else None
+            started = time.perf_counter()
+            try:
+                value = func(*args, **kwargs)
+            except Exception as e:
+                self.record(stage, event, time.perf_counter() - started, key, error=type(e).__name__)
+                raise
+            seconds = time.perf_counter() - started
+            self.record(stage, event, seconds, key, size=frame_bytes(value) if event == 'miss' else None)
+
+            return value
+
+        # keep st cache controls reachable through the wrapper
+        if hasattr(func, 'clear'):
+            wrapper.clear = func.clear
+
+        return wrapper
+
+    def traced(self, stage):
+        return lambda func: self._wrap(stage, 'call', func)
+
+    def computed(self, stage):
+        return lambda func: self._wrap(stage, 'miss', func)
+
+    def summary(self):
+        with self.lock:
+            rows = {stage: dict(stats) for stage, stats in self.stages.items()}
+        for stats in rows.values():
+            stats['hits'] = max(stats['calls'] - stats['misses'] - stats['errors'], 0)
+            stats['mean_ms'] = 1000 * stats['seconds'] / stats['calls'] if stats['calls'] else 0.0
+
+        return rows
+
+    def hot_keys(self, n=10):
+        with self.lock:
+            return [(stage, key, count) for (stage, key), count in self.tickers.most_common(n)]
+
+    def prometheus(self, cache_stats=None):
+        lines = []
+        metrics = [
+            ('stockdoc_stage_calls_total', 'counter', 'calls', 'Calls per stage, cached or not'),
+            ('stockdoc_stage_misses_total', 'counter', 'misses', 'Calls that missed the cache and computed'),
+            ('stockdoc_stage_errors_total', 'counter', 'errors', 'Calls that raised'),
+            ('stockdoc_stage_seconds_total', 'counter', 'seconds', 'Wall time spent per stage'),
+            ('stockdoc_stage_miss_seconds_total', 'counter', 'miss_seconds', 'Wall time spent computing on misses'),
+            ('stockdoc_stage_max_seconds', 'gauge', 'max_seconds', 'Slowest call per stage'),
+            ('stockdoc_stage_payload_bytes_total', 'counter', 'bytes', 'In-memory size of computed values'),
+        ]
+        summary = self.summary()
+        for name, kind, field, help_text in metrics:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for stage, stats in sorted(summary.items()):
+                lines.append(f'{name}{{stage="{stage}"}} {stats[field]}')
+
+        if cache_stats:
+            lines.append('# HELP stockdoc_shared_cache_events_total Shared cache lookups by outcome')
+            lines.append('# TYPE stockdoc_shared_cache_events_total counter')
+            for source, events in sorted(cache_stats.items()):
+                for event, count in sorted(events.items()):
+                    lines.append(f'stockdoc_shared_cache_events_total{{source="{source}",event="{event}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def json_lines(self):
+        with self.lock:
+            events = list(self.events)
+
+        return ''.join(json.dumps(event, default=str) + '\n' for event in events)
+
+
+tracer = Tracer()
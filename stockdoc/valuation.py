@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+# Price multiples over the daily price history. Quarterly fundamentals are
+# looked up at each trading day with searchsorted / np.interp rather than
+# upsampling them to a calendar-daily frame first.
+
+# Valuation tab dropdown entries and the TTM series each one divides market cap by
+VALUATION_METRICS = {
+    "Price to Earnings (P/E)": 'TTM Net Income',
+    "Price to Free Cash Flow (P/FCF)": 'TTM FCF',
+    "Price to Operating Cash Flow (P/OCF)": 'TTM Operating Cash Flow',
+    "Price to EBITDA (P/EBITDA)": 'TTM EBITDA',
+    "Price to Earnings Before Tax (P/EBT)": 'TTM EBT',
+    "Price to Sales (P/S)": 'TTM Revenue',
+}
+
+
+def values_at(series, dates, interpolate=False):
+    # Value of a dated series at each of dates: the last observation on or before
+    # the date, or a straight line in time between the surrounding observations
+    # (NaN before the first one, flat after the last one).
+    x = series.index.to_numpy(dtype='datetime64[ns]').view('int64')
+    t = dates.to_numpy(dtype='datetime64[ns]').view('int64')
+    y = series.to_numpy(dtype='float64')
+
+    if interpolate:
+        valid = ~np.isnan(y)
+        if not valid.any():
+            return pd.Series(np.nan, index=dates)
+        values = np.interp(t, x[valid], y[valid], left=np.nan)
+    else:
+        position = x.searchsorted(t, side='right') - 1
+        values = np.where(position >= 0, y[np.maximum(position, 0)], np.nan)
+
+    return pd.Series(values, index=dates)
+
+
+def valuation_multiples(shares, metrics, prices, today=None):
+    # Market cap over every TTM metric column on each trading day from the first
+    # quarter to today. Prices and shares are aligned once and shared by all the
+    # columns. A metric is interpolated between quarters unless it ever goes
+    # negative, in which case it steps like the share count.
+    if today is None:
+        today = pd.to_datetime('today')
+
+    shares = pd.concat([shares, pd.Series([shares.iloc[-1]], index=[today])])
+    metrics = pd.concat([metrics, metrics.iloc[[-1]].set_axis([today])])
+
+    dates = prices.index[(prices.index >= shares.index[0]) & (prices.index <= today)]
+    dates = pd.DatetimeIndex(dates, name='endDate')
+    mkt_cap = prices.reindex(dates).to_numpy() * values_at(shares, dates).to_numpy()
+
+    multiples = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for column in metrics.columns:
+            metric = metrics[column]
+            values = values_at(metric, dates, interpolate=not (metric.to_numpy() < 0).any())
+            multiples[column] = mkt_cap / values.to_numpy()
+
+    return pd.DataFrame(multiples, index=dates)
+
+
+def build_valuation(quarter, prices):
+    ttm = quarter[list(VALUATION_METRICS.values())].set_axis(list(VALUATION_METRICS), axis=1)
+
+    return valuation_multiples(quarter['Adjusted Shares'], ttm, prices.dropna())
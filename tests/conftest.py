@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+# Keep the shared cache that stockdoc.cache opens on import out of the checkout
+os.environ.setdefault('STOCKDOC_CACHE_URL', os.path.join(tempfile.mkdtemp(prefix='stockdoc-tests-'), 'cache.sqlite'))
+# The benchmark's Firebase and Yahoo stand-ins
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
@@ -0,0 +1,194 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from stockdoc import cache
+from stockdoc.cache import RedisCache, SharedCache, SQLiteCache
+
+# Redis is optional, as it is for the app
+fakeredis = pytest.importorskip('fakeredis')
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache, 'time', SimpleNamespace(time=clock.time))
+    # Every hit writes its access time back, so LRU order follows the clock
+    monkeypatch.setattr(cache, 'ACCESS_RESOLUTION', 0)
+
+    return clock
+
+
+@pytest.fixture
+def sqlite(tmp_path):
+    return SQLiteCache(str(tmp_path / 'cache.sqlite'))
+
+
+@pytest.fixture
+def redis():
+    return RedisCache(fakeredis.FakeRedis())
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def backend(request, clock):
+    return request.getfixturevalue(request.param)
+
+
+def entry_size(value):
+    return len(cache.pickle.dumps(value, protocol=cache.pickle.HIGHEST_PROTOCOL))
+
+
+def test_sqlite_evicts_least_recently_used(tmp_path, clock):
+    value = b'x' * 1000
+    backend = SQLiteCache(str(tmp_path / 'cache.sqlite'), max_bytes=2 * entry_size(value))
+    backend.set('a', clock.now, value, 100)
+    clock.advance(1)
+    backend.set('b', clock.now, value, 100)
+    clock.advance(1)
+    assert backend.get('a') == (clock.now - 2, value)
+
+    clock.advance(1)
+    backend.set('c', clock.now, value, 100)
+
+    assert backend.get('b') is None
+    assert backend.get('a') is not None
+    assert backend.get('c') is not None
+
+
+def test_redis_evicts_least_recently_used(clock):
+    backend = RedisCache(fakeredis.FakeRedis(), max_entries=2)
+    backend.set('a', clock.now, 1, 100)
+    clock.advance(1)
+    backend.set('b', clock.now, 2, 100)
+    clock.advance(1)
+    assert backend.get('a') == (clock.now - 2, 1)
+
+    clock.advance(1)
+    backend.set('c', clock.now, 3, 100)
+
+    assert backend.get('b') is None
+    assert backend.get('a') is not None
+    assert backend.get('c') is not None
+    assert backend.client.zcard(backend.lru) == 2
+
+
+def test_sqlite_entries_expire(sqlite, clock):
+    sqlite.set('a', clock.now, 1, 10)
+    clock.advance(9)
+    assert sqlite.get('a') == (clock.now - 9, 1)
+
+    clock.advance(2)
+    assert sqlite.get('a') is None
+
+
+def test_redis_entries_expire():
+    # Redis expires keys on its own clock
+    backend = RedisCache(fakeredis.FakeRedis())
+    backend.set('a', time.time(), 1, 1)
+    assert backend.get('a') is not None
+
+    time.sleep(1.1)
+    assert backend.get('a') is None
+
+
+def test_delete(backend, clock):
+    backend.set('a', clock.now, 1, 10)
+    backend.delete('a')
+
+    assert backend.get('a') is None
+
+
+def wait_for_refresh(shared):
+    deadline = time.monotonic() + 5
+    while shared.refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not shared.refreshing
+
+
+@pytest.fixture
+def source(monkeypatch):
+    monkeypatch.setitem(cache.CACHE_TTLS, 'test', (10, 5))
+
+    return 'test'
+
+
+def test_stale_window(backend, clock, source):
+    shared = SharedCache(backend)
+    calls = []
+
+    @shared.cached(source)
+    def fetch(ticker):
+        calls.append(ticker)
+        return len(calls)
+
+    assert fetch('ABC') == 1
+    clock.advance(9)
+    assert fetch('ABC') == 1
+
+    # Past the TTL the old value is served while it is fetched again
+    clock.advance(3)
+    assert fetch('ABC') == 1
+    wait_for_refresh(shared)
+    assert fetch('ABC') == 2
+    assert calls == ['ABC', 'ABC']
+
+    assert shared.stats() == {source: {'miss': 1, 'hit': 2, 'stale': 1}}
+
+
+def test_past_stale_window_fetches_before_returning(sqlite, clock, source):
+    shared = SharedCache(sqlite)
+    calls = []
+
+    @shared.cached(source)
+    def fetch(ticker):
+        calls.append(ticker)
+        return len(calls)
+
+    assert fetch('ABC') == 1
+    clock.advance(16)
+    assert fetch('ABC') == 2
+    assert shared.stats() == {source: {'miss': 2}}
+
+
+def test_invalidate(backend, clock, source):
+    shared = SharedCache(backend)
+    calls = []
+
+    @shared.cached(source)
+    def fetch(ticker):
+        calls.append(ticker)
+        return len(calls)
+
+    assert fetch('ABC') == 1
+    fetch.invalidate('ABC')
+    assert fetch('ABC') == 2
+
+
+def test_backend_errors_are_counted(clock, source):
+    class Broken:
+        def get(self, key):
+            raise ConnectionError
+
+        def set(self, key, stored, value, expire):
+            raise ConnectionError
+
+    shared = SharedCache(Broken())
+
+    @shared.cached(source)
+    def fetch(ticker):
+        return ticker.lower()
+
+    assert fetch('ABC') == 'abc'
+    assert shared.stats() == {source: {'error': 2, 'miss': 1}}
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stockdoc.cache import FREEZE_SUPPORTED, freeze, view
+
+# A cached value is one object shared by every session. Whatever a caller does
+# to the view it is handed must leave the cached value as it was.
+
+
+def cached_frame():
+    return freeze(pd.DataFrame({'endDate': pd.date_range('2020-03-31', periods=3, freq='Q'),
+                                'Revenue': [1.0, 2.0, 3.0], 'Shares': [10, 20, 30],
+                                'reportedCurrency': pd.Categorical(['USD'] * 3)}))
+
+
+def test_this_pandas_supports_freezing():
+    # freeze() reaches into pandas internals; if this fails after an upgrade,
+    # view() is deep-copying every cache hit
+    assert FREEZE_SUPPORTED
+
+
+@pytest.mark.parametrize('write', [
+    lambda df: df.iloc.__setitem__((0, 1), 5.0),
+    lambda df: df.loc.__setitem__((0, 'Revenue'), 5.0),
+    lambda df: df['Revenue'].iloc.__setitem__(0, 5.0),
+    lambda df: df.iloc.__setitem__((slice(None), 1), 5.0),
+    lambda df: df.replace(1.0, 5.0, inplace=True),
+])
+def test_cell_writes_raise(write):
+    cached = cached_frame()
+
+    with pytest.raises(ValueError):
+        write(view(cached))
+
+
+@pytest.mark.parametrize('change', [
+    lambda df: df.__setitem__('Revenue', 0.0),
+    lambda df: df.loc.__setitem__((slice(None), 'Shares'), 1.0),
+    lambda df: df.__setitem__('endDate', df['endDate'].dt.date),
+    lambda df: df.__setitem__('New', 1),
+    lambda df: df.drop(columns='Shares', inplace=True),
+    lambda df: df.rename(columns={'Revenue': 'Sales'}, inplace=True),
+    lambda df: df.sort_values('Revenue', ascending=False, inplace=True),
+    lambda df: setattr(df.index, 'name', 'period'),
+    lambda df: setattr(df.columns, 'name', 'field'),
+])
+def test_structural_changes_stay_in_the_view(change):
+    cached = cached_frame()
+    before = cached.copy()
+
+    change(view(cached))
+
+    pd.testing.assert_frame_equal(cached, before)
+    assert cached.index.name is None and cached.columns.name is None
+
+
+def test_view_shares_the_data():
+    cached = cached_frame()
+
+    assert np.shares_memory(view(cached)['Revenue'].to_numpy(), cached['Revenue'].to_numpy())
+
+
+def test_bundles_are_read_only():
+    cached = freeze({'annual': cached_frame(), 'quarter': cached_frame()})
+    served = view(cached)
+
+    with pytest.raises(TypeError):
+        served['quarter'] = None
+    served['annual']['Revenue'] = 0.0
+    assert cached['annual']['Revenue'].tolist() == [1.0, 2.0, 3.0]
+
+
+def test_lists_are_served_as_tuples():
+    served = view(freeze([cached_frame(), cached_frame()]))
+
+    assert isinstance(served, tuple)
+    dfannual, dfquarter = served
+    dfannual['Revenue'] = 0.0
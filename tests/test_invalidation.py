@@ -0,0 +1,144 @@
+import functools
+
+import pytest
+
+from stockdoc import snapshots
+from stockdoc.cache import SharedCache, SQLiteCache
+from stockdoc.invalidation import WATCHED_NODES, ChangeListener, DataVersions, apply_change, changed_tickers, digest
+from stockdoc.snapshots import read_snapshot
+from fixtures import FakeDatabase
+
+
+def record(date, revenue):
+    return {'endDate': date, 'reportedCurrency': 'USD', 'totalRevenue': str(revenue)}
+
+
+NODE = {'ABC': [record('2020-03-31', 10)], 'XYZ': [record('2020-03-31', 20)]}
+
+
+def baseline(node):
+    return {ticker: digest(value) for ticker, value in node.items()}
+
+
+# changed_tickers
+
+
+def test_first_put_only_records_the_baseline():
+    digests, tickers = changed_tickers('quarter', {'event': 'put', 'path': '/', 'data': NODE}, None)
+
+    assert digests == baseline(NODE)
+    assert tickers == []
+
+
+def test_reconnect_replay_reports_only_what_differs():
+    message = {'event': 'put', 'path': '/', 'data': NODE}
+    assert changed_tickers('quarter', message, baseline(NODE)) == (baseline(NODE), [])
+
+    replay = {**NODE, 'ABC': [*NODE['ABC'], record('2020-06-30', 11)], 'NEW': [record('2020-03-31', 1)]}
+    del replay['XYZ']
+    digests, tickers = changed_tickers('quarter', {'event': 'put', 'path': '/', 'data': replay}, baseline(NODE))
+
+    assert digests == baseline(replay)
+    assert tickers == ['ABC', 'NEW', 'XYZ']
+
+
+def test_write_below_the_root_names_its_ticker():
+    message = {'event': 'put', 'path': '/ABC/1', 'data': record('2020-06-30', 11)}
+
+    assert changed_tickers('quarter', message, baseline(NODE)) == (baseline(NODE), ['ABC'])
+
+
+def test_patch_at_the_root_names_every_ticker_in_it():
+    message = {'event': 'patch', 'path': '/', 'data': {'ABC': NODE['ABC'], 'XYZ': NODE['XYZ']}}
+
+    assert changed_tickers('quarter', message, baseline(NODE)) == (baseline(NODE), ['ABC', 'XYZ'])
+
+
+def test_allnames_changes_as_a_whole():
+    names = {'list': {'names': ['ABC', 'XYZ']}}
+    digests, tickers = changed_tickers('allnames', {'event': 'put', 'path': '/', 'data': names}, None)
+    assert tickers == []
+    assert changed_tickers('allnames', {'event': 'put', 'path': '/', 'data': names}, digests)[1] == []
+
+    renamed = {'list': {'names': ['ABC']}}
+    assert changed_tickers('allnames', {'event': 'put', 'path': '/', 'data': renamed}, digests)[1] == ['']
+    assert changed_tickers('allnames', {'event': 'put', 'path': '/list/names/2', 'data': 'NEW'}, digests)[1] == ['']
+
+
+# ChangeListener
+
+
+@pytest.fixture
+def root():
+    return {'year': {ticker: [record('2019-12-31', 100)] for ticker in NODE},
+            'quarter': {ticker: list(records) for ticker, records in NODE.items()},
+            'dividends': {'ABC': {'0': {'date': '2020-03-01', 'amount': '0.5'}}},
+            'allnames': {'list': {'names': list(NODE)}}}
+
+
+@pytest.fixture
+def listener(root, tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path / 'snapshots'))
+    db = FakeDatabase(root)
+    connections = []
+
+    def connect():
+        connections.append(db.connect())
+        return connections[-1]
+
+    versions = DataVersions()
+    cache = SharedCache(SQLiteCache(str(tmp_path / 'cache.sqlite')))
+    listener = ChangeListener(connect, on_change=functools.partial(apply_change, versions=versions, cache=cache))
+    listener.start()
+    yield listener, db.connect(), versions, cache, connections
+    listener.close()
+
+
+def test_each_stream_has_its_own_connection(listener):
+    listener, _, _, _, connections = listener
+
+    assert len(connections) == len(WATCHED_NODES)
+    assert len(set(map(id, connections))) == len(WATCHED_NODES)
+
+
+def test_start_changes_nothing(listener):
+    listener, _, versions, _, _ = listener
+
+    assert sum(listener.changes.values()) == 0
+    assert versions.get('fundamentals', 'ABC') == 0
+
+
+def test_write_resyncs_bumps_and_invalidates(listener):
+    listener, writer, versions, cache, _ = listener
+    for ticker in NODE:
+        cache.backend.set(f'fundamentals:{ticker}', 0, 'cached', 10**10)
+
+    writer.child('quarter').child('ABC').child(1).set(record('2020-06-30', 11))
+
+    assert listener.changes == {'quarter': 1}
+    assert versions.get('fundamentals', 'ABC') == 1
+    assert versions.get('fundamentals', 'XYZ') == 0
+    assert cache.backend.get('fundamentals:ABC') is None
+    assert cache.backend.get('fundamentals:XYZ') is not None
+    assert read_snapshot('quarter', 'ABC')['totalRevenue'].tolist() == [10, 11]
+
+
+def test_dividend_write_bumps_dividends_only(listener):
+    listener, writer, versions, cache, _ = listener
+    cache.backend.set('dividends:ABC', 0, 'cached', 10**10)
+
+    writer.child('dividends').child('ABC').child('1').set({'date': '2020-06-01', 'amount': '0.5'})
+
+    assert versions.get('dividends', 'ABC') == 1
+    assert versions.get('fundamentals', 'ABC') == 0
+    assert cache.backend.get('dividends:ABC') is None
+
+
+def test_failed_change_is_counted(listener):
+    listener, writer, versions, _, _ = listener
+    listener.on_change = lambda db, node, ticker: 1 / 0
+
+    writer.child('year').child('XYZ').child(1).set(record('2020-12-31', 120))
+
+    assert listener.errors == {'year': 1}
+    assert versions.get('fundamentals', 'XYZ') == 0
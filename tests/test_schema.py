@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stockdoc import snapshots
+from stockdoc.snapshots import AMOUNT_DTYPE, read_snapshot, records_to_frame, sync_ticker
+from fixtures import FakeDatabase
+
+# Firebase leaves out fields a filing doesn't have, and JSON nulls come back
+# as None: either way the amount is stored as 0, never NaN
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path))
+
+
+def record(date, **fields):
+    return {'endDate': date, 'reportedCurrency': 'USD', **fields}
+
+
+def test_null_and_missing_amounts_are_zero():
+    df = records_to_frame([record('2020-03-31', totalRevenue=100, netIncome=None),
+                           record('2020-06-30', totalRevenue=None),
+                           record('2020-09-30', totalRevenue='None', netIncome=7)])
+
+    assert df['totalRevenue'].dtype == AMOUNT_DTYPE
+    assert df['totalRevenue'].tolist() == [100, 0, 0]
+    assert df['netIncome'].tolist() == [0, 0, 7]
+    assert df['reportedCurrency'].dtype == 'category'
+
+
+def test_incremental_sync_fills_new_and_missing_fields():
+    root = {'year': {'ABC': [record('2019-12-31', totalRevenue=100)]},
+            'quarter': {'ABC': [record('2020-03-31', totalRevenue=10, netIncome=1)]}}
+    db = FakeDatabase(root)
+    assert sync_ticker(db, 'ABC') == ['year', 'quarter']
+
+    # A field the stored rows never had, and one the new row leaves out
+    root['year']['ABC'].append(record('2020-12-31', totalRevenue=120, netIncome=None))
+    root['quarter']['ABC'].append(record('2020-06-30', totalRevenue=11, capitalExpenditures=3))
+    assert sync_ticker(db, 'ABC') == ['year', 'quarter']
+
+    year, quarter = read_snapshot('year', 'ABC'), read_snapshot('quarter', 'ABC')
+    assert year['netIncome'].tolist() == [0, 0]
+    assert quarter['netIncome'].tolist() == [1, 0]
+    assert quarter['capitalExpenditures'].tolist() == [0, 3]
+    for df in (year, quarter):
+        amounts = df.select_dtypes('number')
+        assert (amounts.dtypes == AMOUNT_DTYPE).all()
+        assert not np.isnan(amounts.to_numpy()).any()
+    assert quarter['endDate'].tolist() == list(pd.to_datetime(['2020-03-31', '2020-06-30']))
@@ -0,0 +1,71 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+
+from stockdoc import precompute
+from stockdoc.metrics import METRIC_COLUMNS, build_metrics
+from stockdoc.precompute import load_metrics
+from stockdoc.service import Handler, parse_params
+from stockdoc.snapshots import fetch_period
+from fixtures import FakeDatabase, synthetic_root
+
+
+@pytest.fixture(scope='module')
+def fundamentals():
+    db = FakeDatabase(synthetic_root(['ABC'], quarters=12))
+
+    return fetch_period(db, 'year', 'ABC'), fetch_period(db, 'quarter', 'ABC')
+
+
+def test_metric_columns_match_build_metrics(fundamentals):
+    metrics = build_metrics(*fundamentals)
+
+    assert list(metrics['quarter'].columns) == METRIC_COLUMNS
+    assert list(metrics['annual'].columns) == METRIC_COLUMNS
+
+
+def test_metrics_come_from_the_artifact_until_the_data_changes(fundamentals, tmp_path, monkeypatch):
+    monkeypatch.setattr(precompute, 'ARTIFACT_DIR', str(tmp_path))
+    built = build_metrics(*fundamentals)
+    for name, table in built.items():
+        path = precompute.artifact_path('v1', 'ABC', name)
+        (tmp_path / 'v1' / 'ABC').mkdir(parents=True, exist_ok=True)
+        table.iloc[:2].to_parquet(path)
+    (tmp_path / 'CURRENT').write_text('v1')
+    calls = []
+
+    def load(ticker):
+        calls.append(ticker)
+        return fundamentals
+
+    assert len(load_metrics('ABC', 0, load)['quarter']) == 2
+    assert calls == []
+    assert len(load_metrics('ABC', 1, load)['quarter']) == len(built['quarter'])
+    assert calls == ['ABC']
+
+
+def test_parse_params_checks_metric_names():
+    assert parse_params('metrics', {'tickers': 'abc', 'metrics': 'Revenue,TTM FCF'})['metrics'] == ['Revenue', 'TTM FCF']
+
+    with pytest.raises(ValueError, match='unknown metrics: Revnue'):
+        parse_params('metrics', {'tickers': 'abc', 'metrics': 'Revenue,Revnue'})
+    with pytest.raises(ValueError, match='unknown valuation metrics: Revenue'):
+        parse_params('valuation', {'tickers': 'abc', 'metrics': ['Revenue']})
+
+
+def test_unknown_metric_is_a_bad_request():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(HTTPError) as error:
+            urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics?tickers=ABC&metrics=Revnue', timeout=5)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert error.value.code == 400
+    assert json.loads(error.value.read()) == {'error': 'unknown metrics: Revnue'}
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from stockdoc.metrics import adjust_for_splits
+
+# adjust_for_splits replaced the while-loops that StocksFirebase3.py ran on
+# every render. legacy_adjust is that loop, kept verbatim apart from names:
+# reference is the quarterly series whose split ratios the annual view
+# substituted for its own.
+
+
+def legacy_adjust(shares, reference=None):
+    split_multiplier = []
+    if reference is not None:
+        quartershares = reference.rename('commonStockSharesOutstanding').reset_index()
+        quartershares['division'] = quartershares['commonStockSharesOutstanding'].div(
+            quartershares['commonStockSharesOutstanding'].shift(1))
+        split_multiplier = quartershares[quartershares['division'] > 1.5].loc[:, 'division'].tolist()
+        split_multiplier.reverse()
+
+    sharesoutstanding = shares.rename('commonStockSharesOutstanding').reset_index()
+    sharesoutstanding['division'] = sharesoutstanding['commonStockSharesOutstanding'].div(
+        sharesoutstanding['commonStockSharesOutstanding'].shift(1))
+
+    i = 0
+    while (sharesoutstanding['division'] > 1.5).any():
+        sharesoutstanding['division'] = sharesoutstanding['division'].shift(-1).fillna(1)
+        sharesoutstanding.loc[sharesoutstanding['division'] < 1.5, 'division'] = pd.NA
+        if reference is not None and i < len(split_multiplier):
+            sharesoutstanding.loc[sharesoutstanding['division'] > 1.5, 'division'] = split_multiplier[i]
+            i = i + 1
+
+        sharesoutstanding = sharesoutstanding.bfill().fillna(1)
+        sharesoutstanding['commonStockSharesOutstanding'] = (sharesoutstanding['commonStockSharesOutstanding']
+                                                             * sharesoutstanding['division'].round())
+        sharesoutstanding['division'] = sharesoutstanding['commonStockSharesOutstanding'].div(
+            sharesoutstanding['commonStockSharesOutstanding'].shift(1))
+
+    return sharesoutstanding.set_index('endDate')['commonStockSharesOutstanding']
+
+
+def quarters(values, start='2018-03-31'):
+    return pd.Series(values, index=pd.date_range(start, periods=len(values), freq='Q', name='endDate'),
+                     dtype='float64')
+
+
+def assert_matches_legacy(shares, reference=None):
+    pd.testing.assert_series_equal(adjust_for_splits(shares, reference=reference),
+                                   legacy_adjust(shares, reference=reference), check_names=False, check_freq=False)
+
+
+QUARTERLY = {
+    'no split': [100, 101, 102, 103, 104, 105],
+    'one split': [100, 101, 202, 204, 206, 208],
+    'several splits': [100, 101, 202, 204, 612, 615, 2460, 2470],
+    'split in the first period': [100, 200, 201, 202],
+    'split in the last period': [100, 101, 102, 1020],
+}
+
+
+@pytest.mark.parametrize('name', QUARTERLY)
+def test_matches_legacy_loop(name):
+    shares = quarters(QUARTERLY[name])
+
+    assert_matches_legacy(shares)
+
+
+def test_known_history():
+    shares = quarters([100, 101, 202, 204, 612, 615])
+
+    assert adjust_for_splits(shares).tolist() == [600, 606, 606, 612, 612, 615]
+
+
+def test_annual_takes_factors_from_quarterly_reference():
+    # The annual ratios (2.03x, 4.03x) include a year of issuance; the factors
+    # come from the quarterly splits inside each fiscal year
+    quarter = quarters([100, 101, 102, 103, 206, 207, 208, 209, 836, 838, 840, 842])
+    annual = quarter.iloc[3::4]
+
+    adjusted = adjust_for_splits(annual, reference=quarter)
+
+    assert_matches_legacy(annual, reference=quarter)
+    assert adjusted.tolist() == [824, 836, 842]
+
+
+def test_annual_without_matching_quarterly_split_uses_own_ratio():
+    annual = quarters([100, 101, 303, 305], start='2015-12-31')
+    quarter = quarters([100, 101, 102, 103, 104, 105])
+
+    assert adjust_for_splits(annual, reference=quarter).tolist() == [300, 303, 303, 305]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_legacy_loop_on_integer_splits(seed):
+    rng = np.random.default_rng(seed)
+    values = 1e9 * np.cumprod(rng.uniform(0.99, 1.01, 40))
+    for position in rng.choice(np.arange(2, 38), rng.integers(0, 4), replace=False):
+        values[position:] *= rng.integers(2, 11)
+    shares = quarters(values)
+
+    assert_matches_legacy(shares)
+
+
+# Where the two disagree on purpose
+
+
+def test_zero_share_count_is_not_a_split():
+    shares = quarters([100, 0, 101, 202, 203, 204])
+
+    assert adjust_for_splits(shares).tolist() == [200, 0, 202, 202, 203, 204]
+    # the loop divided by the zero and spread inf backwards
+    assert np.isinf(legacy_adjust(shares).iloc[0])
+
+
+def test_three_for_two_split():
+    shares = quarters([100, 101, 153.5, 154, 155, 156])
+
+    assert adjust_for_splits(shares).tolist() == [150, 151.5, 153.5, 154, 155, 156]
+    # the loop rounded 1.52x up to a 2-for-1
+    assert legacy_adjust(shares).tolist()[:2] == [200, 202]
+
+
+def test_non_integer_split_followed_by_another():
+    # 1.56x (a 3-for-2 with issuance) then 3.02x: each split applies its own
+    # factor, 1.5 * 3 for the earliest periods
+    shares = quarters([100, 101, 157.56, 159, 480.2, 482])
+
+    assert adjust_for_splits(shares).round(2).tolist() == [450, 454.5, 472.68, 477, 480.2, 482]
+    # the loop re-measured the first jump after applying the second one and
+    # ended on 4x
+    assert legacy_adjust(shares).round(2).tolist()[:2] == [400, 404]